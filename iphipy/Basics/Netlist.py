@@ -0,0 +1,351 @@
+import numpy as np
+try:
+    import scipy.sparse as sparse
+    import scipy.sparse.linalg as sparse_linalg
+except ImportError: # dense NumPy solving is used instead
+    sparse = None
+
+from .Systems import Resistor, Capacitor, Inductance, System, VoltageSource, ACSource, MixedSource
+
+"""Provides Modified Nodal Analysis (MNA) of arbitrary networks
+The network is described as a list of components between named nodes, so bridges, meshes and networks with
+multiple sources can be solved, which isn't possible with nested :System: objects.
+For every frequency f the MNA matrix is A0 + j*2*pi*f*A1 with constant real matrices A0 and A1, the unknowns
+are all node voltages followed by the currents through voltage sources and inductances.
+Phasors U describe a voltage u(t) = Re(U*exp(j*2*pi*f*t)).
+"""
+dense_limit = 120 # systems up to this size are solved for all frequencies at once with stacked dense matrices
+stack_bytes = 2**26 # memory used by one stack of dense matrices
+_R, _C, _L, _V = range(4) # codes of ComponentTable.kinds
+
+def _phasor(source, frequency):
+    """Phasor of a voltage source that's used as excitation at a frequency
+    DC values (and DC offsets of AC sources) only excite at 0Hz, AC sources excite all other frequencies
+    with their peak voltage. Mixed sources are the sum of the phasors of their base sources
+    Args:
+        source (:VoltageSource:): The source
+        frequency (nparray): [Hz] frequencies
+    Returns:
+        nparray: complex phasor for every frequency
+    """
+    if isinstance(source, MixedSource):
+        return sum(_phasor(base, frequency) for base in source.base_sources)
+    if isinstance(source, ACSource):
+        phase = getattr(source, "phase", 0)
+        ac = source.peakvoltage*np.exp(1j*(phase-np.pi/2)) # sin(x) = Re(exp(j*(x-pi/2)))
+        return np.where(frequency == 0, source.reference, ac)
+    return np.where(frequency == 0, source.voltage, 0).astype(complex)
+
+class ComponentTable():
+    """Primitive components of a network as struct of arrays
+    Every element only costs a few bytes per column instead of a Python object, so networks with millions of
+    elements can be held in memory and assembled with vectorized NumPy operations
+    Attributes:
+        kind (nparray): int8 code of every element, index into kinds
+        value (nparray): [Ω, F or H] value of every element, nan for voltage sources
+        node1 (nparray): index of the first node of every element, -1 for the ground
+        node2 (nparray): index of the second node of every element, -1 for the ground
+        names (list of str): name of every element
+        components (list): :Component: or :VoltageSource: of every element, None for elements without object
+    """
+    kinds = ("R", "C", "L", "V")
+
+    def get_kind(self):
+        return self._kind[:self._size]
+    def get_value(self):
+        return self._value[:self._size]
+    def get_node1(self):
+        return self._node1[:self._size]
+    def get_node2(self):
+        return self._node2[:self._size]
+
+    _doc = "Read-Only Property"
+    kind = property(get_kind, None, None, _doc)
+    value = property(get_value, None, None, _doc)
+    node1 = property(get_node1, None, None, _doc)
+    node2 = property(get_node2, None, None, _doc)
+    del _doc
+
+    def __init__(self, capacity = 64):
+        """
+        Args:
+            capacity (int): Number of elements memory is reserved for, the table grows as needed
+        """
+        self._size = 0
+        self._kind = np.empty(capacity, dtype = np.int8)
+        self._value = np.empty(capacity)
+        self._node1 = np.empty(capacity, dtype = np.int64)
+        self._node2 = np.empty(capacity, dtype = np.int64)
+        self.names = []
+        self.components = []
+
+    def __len__(self):
+        return self._size
+
+    def append(self, kind, name, value, node1, node2, component = None):
+        """Add an element
+        Args:
+            kind (str): "R", "C", "L" or "V"
+            name (str): Name of the element
+            value (float): [Ω, F or H] Value of the element, ignored for voltage sources
+            node1 (int): Index of the first node
+            node2 (int): Index of the second node
+            component (:Component: or :VoltageSource: or None): Object of the element
+        Returns:
+            int: index of the element
+        """
+        if self._size == len(self._kind): # double the capacity, so appending stays amortized O(1)
+            for column in ("_kind", "_value", "_node1", "_node2"):
+                old = getattr(self, column)
+                new = np.empty(max(1, 2*len(old)), dtype = old.dtype)
+                new[:self._size] = old
+                setattr(self, column, new)
+        index = self._size
+        self._kind[index] = self.kinds.index(kind)
+        self._value[index] = np.nan if kind == "V" else value
+        self._node1[index] = node1
+        self._node2[index] = node2
+        self.names.append(name)
+        self.components.append(component)
+        self._size += 1
+        return index
+
+    def index(self, component):
+        """Get the index of an element
+        Args:
+            component (:Component:, :VoltageSource: or str): The element or its name
+        Returns:
+            int: index of the element
+        """
+        if isinstance(component, str):
+            if component in self.names:
+                return self.names.index(component)
+        else:
+            for index, cmp in enumerate(self.components):
+                if cmp is component:
+                    return index
+        raise ValueError("{} isn't part of the netlist".format(getattr(component, "name", component)))
+
+class Netlist():
+    """Network of components between named nodes
+    Attributes:
+        name (str): Name of the network
+        ground (str): Name of the reference node, its voltage is 0
+        nodes (list of str): Names of all other nodes in order of their index
+        table (:ComponentTable:): All primitive components
+        elements (list of tuple): (component, index of node 1, index of node 2) for every primitive component,
+            the ground has index -1
+    """
+    def get_elements(self):
+        return list(zip(self.table.components, self.table.node1.tolist(), self.table.node2.tolist()))
+
+    elements = property(get_elements, None, None, "Read-Only Property")
+
+    def __init__(self, name = "netlist", ground = "0"):
+        """
+        Args:
+            name (str): Name of the network
+            ground (str): Name of the reference node
+        """
+        self.name = name
+        self.ground = ground
+        self.nodes = []
+        self.table = ComponentTable()
+        self._node_index = {}
+        self._internal_nodes = 0
+
+    def node(self, name):
+        """Get the index of a node, unknown nodes are created
+        Args:
+            name (str): Name of the node
+        Returns:
+            int: Index of the node, -1 for the ground
+        """
+        if name == self.ground:
+            return -1
+        if name not in self._node_index:
+            self._node_index[name] = len(self.nodes)
+            self.nodes.append(name)
+        return self._node_index[name]
+
+    def add(self, component, node1, node2):
+        """Connect a component between two nodes
+        Systems are expanded into their primitive components, series connections get internal nodes
+        named "<system name>#<number>"
+        Args:
+            component (:Resistor:, :Capacitor:, :Inductance:, :System: or :VoltageSource:): The component.
+                For voltage sources node1 is the positive pole
+            node1 (str): Name of the first node
+            node2 (str): Name of the second node
+        Returns:
+            Netlist: self, so calls can be chained
+        """
+        if isinstance(component, System):
+            component._modecheck()
+            if component.mode == "parallel":
+                for cmp in component.components:
+                    self.add(cmp, node1, node2)
+            else:
+                nodes = [node1]
+                for _ in component.components[:-1]:
+                    self._internal_nodes += 1
+                    nodes.append("{}#{}".format(component.name, self._internal_nodes))
+                nodes.append(node2)
+                for i, cmp in enumerate(component.components):
+                    self.add(cmp, nodes[i], nodes[i+1])
+        elif isinstance(component, (Resistor, Capacitor, Inductance, VoltageSource)):
+            kind = "R" if isinstance(component, Resistor) else "V" if isinstance(component, VoltageSource) else component._kind
+            value = None if kind == "V" else component.value
+            self.table.append(kind, component.name, value, self.node(node1), self.node(node2), component)
+        else:
+            raise TypeError("{} can't be part of a netlist".format(component.__class__.__name__))
+        return self
+
+    def add_element(self, kind, name, value, node1, node2):
+        """Connect a resistor, capacitor or inductance between two nodes without creating a :Component:
+        Args:
+            kind (str): "R", "C" or "L"
+            name (str): Name of the element
+            value (float): [Ω, F or H] Value of the element
+            node1 (str): Name of the first node
+            node2 (str): Name of the second node
+        Returns:
+            Netlist: self, so calls can be chained
+        """
+        if kind not in ("R", "C", "L"):
+            raise ValueError("Only R, C and L elements can be added without object")
+        self.table.append(kind, name, value, self.node(node1), self.node(node2))
+        return self
+
+    def _branches(self):
+        """Elements whose current is an unknown of the MNA system
+        Returns:
+            nparray: indices into the table of all voltage sources and inductances
+        """
+        kind = self.table.kind
+        return np.nonzero((kind == _L) | (kind == _V))[0]
+
+    def _assemble(self):
+        """Assemble the frequency independent parts of the MNA system
+        Returns:
+            Tuple:
+                (rows, columns, A0 values, A1 values, list of (row, source) for the right hand side,
+                size of the system)
+        """
+        n = len(self.nodes)
+        table = self.table
+        kind, value, node1, node2 = table.kind, table.value, table.node1, table.node2
+        passive = np.nonzero((kind == _R) | (kind == _C))[0]
+        i, j = node1[passive], node2[passive]
+        resistive = kind[passive] == _R
+        with np.errstate(divide = "ignore"):
+            g = np.where(resistive, 1/value[passive], 0)
+        c = np.where(resistive, 0, value[passive])
+        # branch currents are additional unknowns
+        branches = self._branches()
+        branch = n+np.arange(len(branches))
+        k, l = node1[branches], node2[branches]
+        inductance = kind[branches] == _L
+        ones, zeros = np.ones(len(branches)), np.zeros(len(branches))
+        rows = np.concatenate((i, j, i, j, k, l, branch, branch, branch[inductance]))
+        cols = np.concatenate((i, j, j, i, branch, branch, k, l, branch[inductance]))
+        a0 = np.concatenate((g, g, -g, -g, ones, -ones, ones, -ones, zeros[inductance]))
+        a1 = np.concatenate((c, c, -c, -c, zeros, zeros, zeros, zeros, -value[branches][inductance])) # u = j*omega*L*i
+        grounded = (rows >= 0) & (cols >= 0)
+        excitations = [(n+m, table.components[index]) for m, index in enumerate(branches) if kind[index] == _V]
+        return rows[grounded], cols[grounded], a0[grounded], a1[grounded], excitations, n+len(branches)
+
+    def solve(self, frequencies, method = None):
+        """Solve the network for a frequency band
+        Args:
+            frequencies (numeric or nparray): [Hz] Frequencies to solve for
+            method (str or None): "dense" solves stacks of (frequencies, n, n) matrices with one batched
+                np.linalg.solve call, "sparse" factorizes a sparse matrix per frequency.
+                Standart is "dense" for small networks (see dense_limit) or if SciPy isn't available
+        Returns:
+            :NodalSolution: node voltages and branch currents for every frequency
+        """
+        frequencies = np.atleast_1d(np.asarray(frequencies, dtype = float))
+        rows, cols, a0, a1, excitations, size = self._assemble()
+        if method is None:
+            method = "dense" if size <= dense_limit or sparse is None else "sparse"
+        rhs = np.zeros((len(frequencies), size), dtype = complex)
+        for row, source in excitations:
+            rhs[:, row] += _phasor(source, frequencies)
+        omega = 2*np.pi*frequencies
+        x = np.empty((len(frequencies), size), dtype = complex)
+        if method == "dense":
+            A0 = np.zeros((size, size))
+            A1 = np.zeros((size, size))
+            np.add.at(A0, (rows, cols), a0)
+            np.add.at(A1, (rows, cols), a1)
+            chunk = max(1, stack_bytes//(16*size*size))
+            for start in range(0, len(frequencies), chunk):
+                w = omega[start:start+chunk, None, None]
+                A = A0 + 1j*w*A1
+                x[start:start+chunk] = np.linalg.solve(A, rhs[start:start+chunk, :, None])[..., 0]
+        elif method == "sparse":
+            if sparse is None:
+                raise ImportError("Sparse solving requires SciPy")
+            A0 = sparse.csc_matrix((a0, (rows, cols)), shape = (size, size), dtype = complex)
+            A1 = sparse.csc_matrix((a1, (rows, cols)), shape = (size, size), dtype = complex)
+            for k, w in enumerate(omega):
+                x[k] = sparse_linalg.spsolve(A0 + 1j*w*A1, rhs[k])
+        else:
+            raise ValueError("Selected method doesn't exist")
+        return NodalSolution(self, frequencies, x)
+
+    def dc(self):
+        """Solve the network for DC, capacitors are open and inductances are shorted
+        Returns:
+            :NodalSolution: node voltages and branch currents
+        """
+        return self.solve(0)
+
+class NodalSolution():
+    """Solution of a :Netlist:
+    Attributes:
+        netlist (:Netlist:): The solved network
+        frequencies (nparray): [Hz] Frequencies of the solution
+        voltages (nparray): [V] Node voltage phasors, shape (frequencies, nodes)
+        branch_currents (nparray): [A] Current phasors through voltage sources and inductances,
+            shape (frequencies, branches)
+    """
+    def __init__(self, netlist, frequencies, x):
+        self.netlist = netlist
+        self.frequencies = frequencies
+        self.voltages = x[:, :len(netlist.nodes)]
+        self.branch_currents = x[:, len(netlist.nodes):]
+        self._branches = {index: k for k, index in enumerate(netlist._branches().tolist())}
+
+    def voltage(self, node1, node2 = None):
+        """Voltage between two nodes
+        Args:
+            node1 (str): Name of the node
+            node2 (str or None): Name of the reference node, standart is the ground
+        Returns:
+            nparray: complex voltage for every frequency
+        """
+        def potential(node):
+            if node is None or node == self.netlist.ground:
+                return np.zeros(len(self.frequencies), dtype = complex)
+            return self.voltages[:, self.netlist._node_index[node]]
+        return potential(node1)-potential(node2)
+
+    def current(self, component):
+        """Current through a component from its first to its second node
+        For voltage sources this is the current flowing into the positive pole
+        Args:
+            component (:Component:, :VoltageSource: or str): Primitive component of the network or its name
+        Returns:
+            nparray: complex current for every frequency
+        """
+        table = self.netlist.table
+        index = table.index(component)
+        if index in self._branches:
+            return self.branch_currents[:, self._branches[index]]
+        i, j = table.node1[index], table.node2[index]
+        u = (self.voltages[:, i] if i >= 0 else 0) - (self.voltages[:, j] if j >= 0 else 0)
+        if table.kind[index] == _R:
+            return u/table.value[index]
+        return 2j*np.pi*self.frequencies*table.value[index]*u
@@ -0,0 +1,186 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+"""Stores results of analyses in a binary format
+A result store is a directory with one .npy file per array and a metadata.json with the description of the
+analysis. Arrays can be written incrementally, chunk by chunk, and are memory mapped when they are read,
+so huge sweeps and waveforms never have to fit into memory:
+    with ResultWriter("sweep", {"system": "Z1"}) as writer:
+        writer.write("frequencies", frequencies)
+        for chunk in chunks:
+            writer.append(impedance = system.compile().impedance(chunk))
+    impedance = Results("sweep")["impedance"] # read only memory map
+"""
+_header_size = 128 # bytes reserved for the .npy header, enough for up to 4 dimensions of any length
+
+def _header(dtype, shape):
+    """.npy (version 1.0) header, padded to a fixed size so it can be rewritten once the final shape is known
+    Args:
+        dtype (np.dtype): dtype of the array
+        shape (tuple of int): shape of the array
+    Returns:
+        bytes: the header
+    """
+    header = "{{'descr': {!r}, 'fortran_order': False, 'shape': {!r}, }}".format(np.lib.format.dtype_to_descr(dtype), tuple(shape))
+    length = _header_size-len(np.lib.format.magic(1, 0))-2
+    if len(header) >= length:
+        raise ValueError("Arrays with shape {} can't be written incrementally".format(shape))
+    return np.lib.format.magic(1, 0)+struct.pack("<H", length)+(header+" "*(length-len(header)-1)+"\n").encode("latin1")
+
+def _jsonable(value):
+    """Convert NumPy values and containers of them into JSON serializable objects
+    """
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, (np.ndarray, np.generic)):
+        value = value.tolist()
+    if isinstance(value, complex):
+        return [value.real, value.imag]
+    return value
+
+class ResultWriter():
+    """Writes a result store
+    Should be used as context manager, the store is only complete once it's closed
+    Attributes:
+        path (str): Directory of the store
+        metadata (dict): Description of the results, written to metadata.json
+    """
+    def __init__(self, path, metadata = None):
+        """
+        Args:
+            path (str): Directory of the store, it's created if it doesn't exist
+            metadata (dict or None): Description of the results like names, component values or
+                frequency bands. NumPy values are converted
+        """
+        self.path = path
+        self.metadata = dict(metadata or {})
+        self._files = {} # name: (file, dtype, shape of one row, number of rows)
+        self._arrays = {}
+        os.makedirs(path, exist_ok = True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def write(self, name, array):
+        """Write a whole array at once
+        Args:
+            name (str): Name of the array
+            array (nparray): The array
+        """
+        array = np.asarray(array)
+        np.save(os.path.join(self.path, name+".npy"), array)
+        self._arrays[name] = {"dtype": np.lib.format.dtype_to_descr(array.dtype), "shape": array.shape}
+
+    def append(self, **arrays):
+        """Append chunks to arrays along their first axis
+        The first chunk of an array sets its dtype and the shape of the other axes
+        Args:
+            **arrays (nparray): name of the array: chunk
+        """
+        for name, chunk in arrays.items():
+            chunk = np.asarray(chunk)
+            if name not in self._files:
+                file = open(os.path.join(self.path, name+".npy"), "wb")
+                file.write(_header(chunk.dtype, (0,)+chunk.shape[1:]))
+                self._files[name] = [file, chunk.dtype, chunk.shape[1:], 0]
+            file, dtype, row, rows = self._files[name]
+            if chunk.shape[1:] != row:
+                raise ValueError("Chunk of shape {} doesn't fit to rows of shape {}".format(chunk.shape, row))
+            file.write(np.ascontiguousarray(chunk, dtype = dtype).tobytes())
+            self._files[name][3] += len(chunk)
+
+    def close(self):
+        """Write the final shapes of all incrementally written arrays and the metadata
+        """
+        for name, (file, dtype, row, rows) in self._files.items():
+            file.seek(0)
+            file.write(_header(dtype, (rows,)+row))
+            file.close()
+            self._arrays[name] = {"dtype": np.lib.format.dtype_to_descr(dtype), "shape": (rows,)+row}
+        self._files = {}
+        with open(os.path.join(self.path, "metadata.json"), "w") as file:
+            json.dump({"metadata": _jsonable(self.metadata), "arrays": _jsonable(self._arrays)}, file, indent = 1)
+
+class Results():
+    """Reads a result store
+    Arrays are memory mapped on first access, nothing is copied until it's used
+    Attributes:
+        path (str): Directory of the store
+        metadata (dict): Description of the results
+        names (list of str): Names of all arrays
+    """
+    def __init__(self, path, mode = "r"):
+        """
+        Args:
+            path (str): Directory of the store
+            mode (str): Memory map mode, "r" is read only, "r+" writes changes back to the files
+        """
+        self.path = path
+        self._mode = mode
+        with open(os.path.join(path, "metadata.json")) as file:
+            content = json.load(file)
+        self.metadata = content["metadata"]
+        self.names = list(content["arrays"])
+        self._arrays = {}
+
+    def __getitem__(self, name):
+        if name not in self.names:
+            raise KeyError(name)
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.path, name+".npy"), mmap_mode = self._mode)
+        return self._arrays[name]
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __iter__(self):
+        return iter(self.names)
+
+def _system_metadata(system):
+    """Name and component values of a :System:
+    """
+    compiled = system.compile()
+    return {"name": system.name, "mode": system.mode, "components": dict(zip(compiled.names, compiled.values))}
+
+def save_sweep(path, sweep, system = None, metadata = None):
+    """Store a :SweepResult: of System.sweep() or Circuit.sweep()
+    Args:
+        path (str): Directory of the store
+        sweep (SweepResult): The sweep
+        system (:System: or None): The swept System, its name and component values are stored
+        metadata (dict or None): Additional description of the results
+    """
+    metadata = dict(metadata or {})
+    if system is not None:
+        metadata["system"] = _system_metadata(system)
+    frequencies = np.asarray(sweep.frequencies)
+    metadata["band"] = {"start": frequencies.min(), "stop": frequencies.max(), "points": frequencies.size}
+    with ResultWriter(path, metadata) as writer:
+        for name, array in sweep._asdict().items():
+            writer.write(name, array)
+
+def save_current(path, circuit, start, stop, samplerate, chunksize = 2**16, metadata = None):
+    """Calculate the current of a :Circuit: and store it chunk by chunk
+    Arbitrarily long time spans can be stored without holding them in memory
+    Args:
+        path (str): Directory of the store
+        circuit (:Circuit:): The circuit
+        start (numeric): [s] Time of the first sample
+        stop (numeric): [s] End of the time span
+        samplerate (numeric): [1/s] Samples per second
+        chunksize (int): Number of samples calculated at once
+        metadata (dict or None): Additional description of the results
+    """
+    metadata = dict(metadata or {}, circuit = circuit.name, system = _system_metadata(circuit.system),
+        start = start, stop = stop, samplerate = samplerate)
+    with ResultWriter(path, metadata) as writer:
+        for time, current in circuit.current_stream(start, stop, samplerate, chunksize = chunksize):
+            writer.append(time = time, current = current)
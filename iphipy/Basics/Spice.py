@@ -0,0 +1,203 @@
+import collections
+import math
+import re
+
+from .Netlist import Netlist, _V
+from .Systems import Resistor, Capacitor, Inductance, System, DCSource, ACSource, MixedSource, Circuit
+
+"""Reads and writes networks in a subset of the SPICE netlist format
+Supported are R, C, L and V element lines with SI suffixes (1k, 10u, 2.2MEG, ...), DC and SIN() sources,
+"*" comment lines, ";" inline comments, "+" continuation lines and .end. Other control lines are ignored.
+Files are processed line by line, so arbitrarily large netlists never have to be held in memory as text:
+    R1 in out 1k
+    C1 out 0 100n
+    V1 in 0 SIN(0 1 50)
+"""
+Element = collections.namedtuple("Element", ("kind", "name", "node1", "node2", "value"))
+
+_suffixes = {"t": 12, "g": 9, "meg": 6, "k": 3, "m": -3, "u": -6, "µ": -6, "n": -9, "p": -12, "f": -15} # decimal exponents
+_number = re.compile(r"([+-]?(?:\d+\.?\d*|\.\d+))(?:e([+-]?\d+))?(meg|[tgkmuµnpf])?", re.IGNORECASE)
+
+def value(string):
+    """Convert a SPICE number to float
+    Units after the suffix are ignored
+    Args:
+        string (str): Number with optional SI suffix like "4.7k", "10uF" or "2MEG"
+    Returns:
+        float: the value
+    Examples:
+        >>> value("4.7k")
+        4700.0
+        >>> value("10uF")
+        1e-05
+    """
+    match = _number.match(string)
+    if match is None:
+        raise ValueError("{} isn't a number".format(string))
+    number, exponent, suffix = match.groups()
+    exponent = int(exponent or 0)+(_suffixes[suffix.lower()] if suffix else 0)
+    return float("{}e{}".format(number, exponent)) # exact decimal, no rounding error of a multiplication
+
+def _lines(file):
+    """Logical lines of a netlist, comments are removed and continuation lines are joined
+    Args:
+        file (iterable of str): Lines of the netlist
+    Returns:
+        generator: (number of the first physical line, logical line)
+    """
+    number, pending = 0, None
+    for number_, line in enumerate(file, 1):
+        line = line.split(";", 1)[0].strip()
+        if not line or line.startswith("*"):
+            continue
+        if line.startswith("+"):
+            if pending is None:
+                raise ValueError("line {}: continuation without a line to continue".format(number_))
+            pending += " "+line[1:]
+            continue
+        if pending is not None:
+            yield number, pending
+        number, pending = number_, line
+    if pending is not None:
+        yield number, pending
+
+def _source(tokens, number):
+    """Parse the specification of a voltage source
+    Args:
+        tokens (list of str): Everything after the nodes, parentheses and commas removed
+        number (int): Line number for error messages
+    Returns:
+        Tuple: ("DC", voltage) or ("SIN", offset, amplitude, frequency, delay, damping, phase in degrees)
+    """
+    if not tokens:
+        raise ValueError("line {}: source without value".format(number))
+    keyword = tokens[0].upper()
+    if keyword == "SIN":
+        parameters = [value(token) for token in tokens[1:]]
+        if not 3 <= len(parameters) <= 6:
+            raise ValueError("line {}: SIN needs 3 to 6 parameters".format(number))
+        return ("SIN",)+tuple(parameters)+(0,)*(6-len(parameters))
+    if keyword == "DC":
+        tokens = tokens[1:]
+    if len(tokens) != 1:
+        raise ValueError("line {}: unsupported source {}".format(number, " ".join(tokens)))
+    return ("DC", value(tokens[0]))
+
+def elements(file):
+    """Parse a netlist line by line
+    Args:
+        file (iterable of str): Lines of the netlist without the title line
+    Returns:
+        generator: :Element: (kind, name, node1, node2, value) for every element line, value is a float for
+            R, C and L and a tuple (see _source()) for V
+    """
+    for number, line in _lines(file):
+        if line.startswith("."):
+            command = line.split()[0].lower()
+            if command == ".end":
+                return
+            elif command in (".subckt", ".include", ".lib"):
+                raise ValueError("line {}: {} isn't supported".format(number, command))
+            continue
+        tokens = line.replace("(", " ").replace(")", " ").replace(",", " ").split()
+        kind = tokens[0][0].upper()
+        if kind not in ("R", "C", "L", "V"):
+            raise ValueError("line {}: {} elements aren't supported".format(number, kind))
+        if len(tokens) < 4:
+            raise ValueError("line {}: element needs two nodes and a value".format(number))
+        name, node1, node2 = tokens[:3]
+        if kind == "V":
+            yield Element(kind, name, node1, node2, _source(tokens[3:], number))
+        else:
+            yield Element(kind, name, node1, node2, value(tokens[3]))
+
+def component(element, frequency = "f", time = "t"):
+    """Create the component of a parsed element
+    Args:
+        element (:Element:): The element
+        frequency (str or sp.core.symbol.Symbol): Frequency of capacitors and inductances
+        time (str or sp.core.symbol.Symbol): Time of AC sources
+    Returns:
+        :Resistor:, :Capacitor:, :Inductance:, :DCSource: or :ACSource:
+    """
+    if element.kind == "R":
+        return Resistor(element.name, element.value)
+    elif element.kind == "C":
+        return Capacitor(element.name, element.value, frequency)
+    elif element.kind == "L":
+        return Inductance(element.name, element.value, frequency)
+    if element.value[0] == "DC":
+        return DCSource(element.name, element.value[1], 0)
+    offset, amplitude, frequency_, delay, damping, phase = element.value[1:]
+    if damping:
+        raise ValueError("Damped sine sources aren't supported")
+    source = ACSource(element.name, amplitude, offset, frequency_, time)
+    source.phase = math.radians(phase)-2*math.pi*frequency_*delay
+    return source
+
+def read(file, title = True, components = True, frequency = "f", time = "t"):
+    """Read a netlist
+    Args:
+        file (str or iterable of str): Path of the file or an open file
+        title (bool): If the first line is the title line, as in SPICE. It's used as name of the netlist
+        components (bool): If R, C and L elements are created as :Component: objects. Otherwise they are only
+            stored in the table of the netlist, which needs much less memory for large netlists
+        frequency (str or sp.core.symbol.Symbol): Frequency of capacitors and inductances
+        time (str or sp.core.symbol.Symbol): Time of AC sources
+    Returns:
+        :Netlist: the network, the ground is node "0"
+    """
+    if isinstance(file, str):
+        with open(file) as file_:
+            return read(file_, title, components, frequency, time)
+    lines = iter(file)
+    name = next(lines, "").strip() if title else ""
+    netlist = Netlist(name or "netlist", "0")
+    for element in elements(lines):
+        if element.kind == "V" or components:
+            netlist.add(component(element, frequency, time), element.node1, element.node2)
+        else:
+            netlist.add_element(element.kind, element.name, element.value, element.node1, element.node2)
+    return netlist
+
+def _source_line(source):
+    """Specification of a voltage source in a netlist
+    Returns:
+        str: "DC <voltage>" or "SIN(<offset> <amplitude> <frequency> 0 0 <phase>)"
+    """
+    if isinstance(source, MixedSource) or isinstance(source, ACSource) and source.mode != "AC sine":
+        raise ValueError("{} can't be written, only DC and sine sources are supported".format(source.name))
+    if isinstance(source, ACSource):
+        return "SIN({!r} {!r} {!r} 0 0 {!r})".format(float(source.reference), float(source.peakvoltage),
+            float(source.frequency), math.degrees(source.phase))
+    return "DC {!r}".format(float(source.voltage))
+
+def write(network, file, node1 = "1", node2 = "0"):
+    """Write a network as netlist
+    Systems are expanded into their primitive components, series connections get internal nodes named
+    "<system name>#<number>". Names that don't start with the letter of the element are prefixed with it,
+    whitespace in names is replaced by "_"
+    Args:
+        network (:Netlist:, :System: or :Circuit:): The network
+        file (str or file object): Path of the file or an open file
+        node1 (str): Node the first pole of a System is connected to
+        node2 (str): Node the second pole of a System is connected to, "0" is the ground
+    """
+    if isinstance(file, str):
+        with open(file, "w") as file_:
+            return write(network, file_, node1, node2)
+    if isinstance(network, Circuit):
+        network = network.to_netlist()
+    elif isinstance(network, System):
+        network = Netlist(network.name, "0").add(network, node1, node2)
+    table = network.table
+    nodes = [re.sub(r"\s+", "_", node) for node in network.nodes]+["0"] # index -1 is the ground
+    file.write("{}\n".format(network.name))
+    for index, (kind, value_, i, j) in enumerate(zip(table.kind.tolist(), table.value.tolist(),
+        table.node1.tolist(), table.node2.tolist())):
+        letter = table.kinds[kind]
+        name = re.sub(r"\s+", "_", table.names[index])
+        name = name if name[:1].upper() == letter else letter+name
+        specification = _source_line(table.components[index]) if kind == _V else repr(value_)
+        file.write("{} {} {} {}\n".format(name, nodes[i], nodes[j], specification))
+    file.write(".end\n")
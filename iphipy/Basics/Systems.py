@@ -1,17 +1,246 @@
-import mpmath
+import collections
+import concurrent.futures
+import fractions
+import functools
+import hashlib
+import importlib
+import itertools
+import math
 from multiprocessing import Process
+import os
 import threading
-import matplotlib.pyplot as plt
+import weakref
+import zipfile
 import numpy as np
-import sympy as sp
 
 """Provides classes for dealing with electrical circuits
-ToDo:
-    implementing __slots__() for all classes(no inheritance!)
-    finding out why DC plotting process name is messed up
-    DC-equivalent voltage calculation of voltage: solve U² = 1/T * integral from 0 to T of u² for u²
 """
-mixed_source_counter = 1
+
+class _LazyModule():
+    """Module that's only imported when one of its attributes is accessed for the first time
+    Used for dependencies that are only needed for plotting or rarely used analyses
+    """
+    def __init__(self, name):
+        """
+        Args:
+            name (str): Absolute name of the module
+        """
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+plt = _LazyModule("matplotlib.pyplot")
+mpmath = _LazyModule("mpmath")
+sp = _LazyModule("sympy") # numeric evaluations never touch SymPy, it's imported with the first symbolic expression
+
+CacheInfo = collections.namedtuple("CacheInfo", ("hits", "misses", "maxsize", "currsize"))
+SweepResult = collections.namedtuple("SweepResult", ("frequencies", "impedance", "admittance", "current", "voltage"))
+Resonances = collections.namedtuple("Resonances", ("resonances", "antiresonances"))
+ToleranceResult = collections.namedtuple("ToleranceResult", ("frequencies", "samples", "mean", "std", "percentiles"))
+Bode = collections.namedtuple("Bode", ("frequencies", "magnitude", "phase"))
+
+class LambdifyCache():
+    """Bounded LRU cache of lambdified expressions
+    Expressions are keyed on their structure and the tuple of arguments, so equal expressions share one function
+    Attributes:
+        hits (int): Number of lookups that were served from the cache
+        misses (int): Number of lookups that had to lambdify the expression
+        maxsize (int): Maximum number of cached functions, least recently used ones are dropped first
+    """
+    def get_maxsize(self):
+        return self._maxsize
+    def set_maxsize(self, maxsize):
+        if maxsize < 0:
+            raise ValueError("maxsize can't be negative")
+        with self._lock:
+            self._maxsize = maxsize
+            while len(self._cache) > maxsize:
+                self._cache.popitem(last = False)
+
+    maxsize = property(get_maxsize, set_maxsize, None, "Maximum number of cached functions")
+
+    def __init__(self, maxsize = 256):
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, args, expr):
+        """Lambdify an expression or get it from the cache
+        Args:
+            args (sp.core.symbol.Symbol or iterable of sp.core.symbol.Symbol): Arguments of the function
+            expr (Sympy Expression): Expression to lambdify
+        Returns:
+            function: Lambdified expression
+        """
+        key = (args if isinstance(args, sp.Basic) else tuple(args), expr)
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self.misses += 1
+        func = sp.lambdify(key[0], expr)
+        with self._lock:
+            self._cache[key] = func
+            while len(self._cache) > self._maxsize:
+                self._cache.popitem(last = False)
+        return func
+
+    def info(self):
+        """Get statistics of the cache
+        Returns:
+            CacheInfo: hits, misses, maxsize and current size
+        """
+        return CacheInfo(self.hits, self.misses, self._maxsize, len(self._cache))
+
+    def clear(self):
+        """Remove all functions from the cache and reset the statistics
+        """
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+lambdify = LambdifyCache()
+
+_transfer_function_version = 1 # has to be increased whenever CompiledSystem._transfer_function() changes
+
+class TransferFunctionCache():
+    """Bounded LRU cache of the transfer functions of :CompiledSystem: programs
+    Transfer functions are keyed by a hash of the canonical program (component kinds, topology and modes) and
+    the component values. Besides the cache in memory their coefficients can be stored as .npz files in a
+    directory, so other processes (e.g. workers) load them instead of deriving them again. Only coefficients
+    are stored, nothing that's read from the directory is executed
+    Attributes:
+        hits (int): Number of lookups that were served from memory
+        disk_hits (int): Number of lookups that were served from the directory
+        misses (int): Number of lookups that had to derive the transfer function
+        maxsize (int): Maximum number of transfer functions in memory, least recently used ones are dropped first
+        disk_maxsize (int): [byte] Maximum size of the directory, least recently used files are removed first
+        directory (str or None): Directory of the cache, None disables it.
+            The module level cache uses $IPHIPY_CACHE and is disabled if it isn't set
+    """
+    def get_maxsize(self):
+        return self._maxsize
+    def set_maxsize(self, maxsize):
+        if maxsize < 0:
+            raise ValueError("maxsize can't be negative")
+        with self._lock:
+            self._maxsize = maxsize
+            while len(self._cache) > maxsize:
+                self._cache.popitem(last = False)
+
+    maxsize = property(get_maxsize, set_maxsize, None, "Maximum number of transfer functions in memory")
+
+    def __init__(self, maxsize = 256, disk_maxsize = 2**26, directory = None):
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._maxsize = maxsize
+        self.disk_maxsize = disk_maxsize
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __call__(self, compiled):
+        """Get the transfer function of a compiled System
+        Args:
+            compiled (:CompiledSystem:): System with a single value for every component
+        Returns:
+            :TransferFunction: coefficients of numerator and denominator, highest power first
+        """
+        key = hashlib.sha256(repr((_transfer_function_version, compiled._program,
+            tuple(float(value) for value in compiled.values))).encode()).hexdigest()
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                transfer_function = self._cache[key]
+            else:
+                transfer_function = None
+        if transfer_function is None:
+            transfer_function = self._load(key)
+            if transfer_function is None:
+                transfer_function = compiled._transfer_function()
+                self._store(key, transfer_function)
+                self.misses += 1
+            else:
+                self.disk_hits += 1
+            with self._lock:
+                self._cache[key] = transfer_function
+                while len(self._cache) > self._maxsize:
+                    self._cache.popitem(last = False)
+        return TransferFunction(transfer_function.numerator.copy(), transfer_function.denominator.copy())
+
+    def _load(self, key):
+        """Load coefficients from the directory
+        Returns:
+            :TransferFunction: or None if it isn't cached
+        """
+        if self.directory is None:
+            return None
+        path = os.path.join(self.directory, key+".npz")
+        try:
+            with np.load(path, allow_pickle = False) as file:
+                transfer_function = TransferFunction(file["numerator"], file["denominator"])
+            os.utime(path) # the modification time marks the last use for the eviction
+            return transfer_function
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+            return None
+
+    def _store(self, key, transfer_function):
+        """Store coefficients in the directory and remove least recently used files if it's too big
+        Errors are ignored, the cache in memory still works without the directory
+        """
+        if self.directory is None:
+            return
+        path = os.path.join(self.directory, key+".npz")
+        try:
+            os.makedirs(self.directory, exist_ok = True)
+            temporary = "{}.{}.tmp".format(path, os.getpid())
+            with open(temporary, "wb") as file:
+                np.savez(file, numerator = transfer_function.numerator, denominator = transfer_function.denominator)
+            os.replace(temporary, path) # atomic, so concurrent processes never read half written files
+            files = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in os.scandir(self.directory)
+                if entry.name.endswith(".npz"))
+            size = sum(file[1] for file in files)
+            for _, file_size, file_path in files:
+                if size <= self.disk_maxsize:
+                    break
+                os.remove(file_path)
+                size -= file_size
+        except OSError:
+            pass
+
+    def info(self):
+        """Get statistics of the cache in memory
+        Returns:
+            CacheInfo: hits, misses, maxsize and current size
+        """
+        return CacheInfo(self.hits, self.misses, self._maxsize, len(self._cache))
+
+    def clear(self, disk = False):
+        """Remove all transfer functions from memory and reset the statistics
+        Args:
+            disk (bool): If the files in the directory are removed as well
+        """
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+        if disk and self.directory is not None and os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".npz"):
+                    os.remove(entry.path)
+
+transfer_functions = TransferFunctionCache(directory = os.environ.get("IPHIPY_CACHE"))
 
 def eval(expr, args = None):
     """Lambdify and vectorize an expression
@@ -31,12 +260,55 @@ def eval(expr, args = None):
             raise ValueError("Args contains symbols that are not in the expression")
     else:
         args = free
-    args = list(args)
-    return (np.vectorize(sp.lambdify(args, expr)), args)
+    args = sorted(args, key = str)
+    return (np.vectorize(lambdify(args, expr)), args)
+
+def _tolerance_chunk(compiled, frequencies, values, mode):
+    """Evaluate the magnitude of a :CompiledSystem: for a chunk of component values
+    Module level function so it can be sent to worker processes
+    """
+    if mode == "impedance":
+        return np.abs(compiled.impedance(frequencies, values))
+    elif mode == "admittance":
+        return np.abs(compiled.admittance(frequencies, values))
+    else:
+        raise ValueError("Selected mode doesn't exist")
+
+def _buffer(time, out):
+    """Get the float64 buffer for samples at the given times
+    Args:
+        time (nparray): [s] times of the samples
+        out (nparray or None): Preallocated buffer, a new one is created if it's None
+    Returns:
+        nparray: The buffer
+    """
+    if out is None:
+        return np.empty(np.shape(time), dtype = float)
+    if out.shape != np.shape(time) or out.dtype != np.float64:
+        raise ValueError("out has to be a float64 array of the shape of time")
+    return out
+
+def _chunks(start, stop, samplerate, chunksize):
+    """Generate the times of a sampled time span chunk by chunk
+    Every time is calculated from its sample index, so there's no drift between chunks
+    Args:
+        start (numeric): [s] Time of the first sample
+        stop (numeric or None): [s] End of the time span (exclusive), None for an endless stream
+        samplerate (numeric): [Hz] Samples per second
+        chunksize (int): Samples per chunk, the last chunk can be shorter
+    Yields:
+        nparray: [s] times of the chunk
+    """
+    total = None if stop is None else int(round((stop-start)*samplerate))
+    index = 0
+    while total is None or index < total:
+        size = chunksize if total is None else min(chunksize, total-index)
+        yield start + np.arange(index, index+size)/samplerate
+        index += size
 
 def _checkrange(range_):
         if len(range_)<=500:
-            range_ = np.linspace(range_[0],range_[-1], 50e3)
+            range_ = np.linspace(range_[0],range_[-1], int(50e3))
         range_ = np.asarray(range_)
         return range_
 
@@ -45,6 +317,20 @@ def ee_symbol(name):
     """
     return sp.symbols(name, real = True, nonzero = True)
 
+def _name(symbol):
+    """Name of a symbol that's given as sympy symbol or as str
+    Returns:
+        str or None: the name, None stays None
+    """
+    return symbol if symbol is None or isinstance(symbol, str) else symbol.name
+
+def _symbol(symbol):
+    """Symbol that's given as sympy symbol or as str
+    Returns:
+        sp.core.symbol.Symbol: the symbol
+    """
+    return ee_symbol(symbol) if isinstance(symbol, str) else symbol
+
 class Component():
     """General Electrical Component
     Attributes:
@@ -52,7 +338,13 @@ class Component():
         admittance (numeric): Admittance of the Component
         symbolic_impedance (sp.core.symbol.Symbol): Impedance of the Component as symbolic expression
         symbolic_admittance (sp.core.symbol.Symbol): Admittance of the Component as symbolic expression
+        symbol (sp.core.symbol.Symbol): Symbol of the Component, SymPy is only used once it's accessed
+        value (numeric or nparray): Value of the Component. An array of values makes the Component represent a
+            whole family of designs, numeric evaluations broadcast to (*value shape, *frequency shape).
+            Changing it invalidates the cached properties of the Component and of all Systems containing it
     """
+    __slots__ = ("name", "_symbol", "_value", "_parents", "_impedance", "_admittance", "_symbolic_impedance",
+        "_symbolic_admittance", "__weakref__")
 
     def get_impedance(self): # could eventually be implemented as a method since only read is needed
         return self._impedance
@@ -62,6 +354,17 @@ class Component():
         return self._symbolic_impedance
     def get_symbolic_admittance(self):
         return self._symbolic_admittance
+    def get_symbol(self):
+        if self._symbol is None:
+            self._symbol = ee_symbol(self.name)
+        return self._symbol
+    def get_value(self):
+        return self._value
+    def set_value(self, value):
+        value = np.asarray(value, dtype = float) if isinstance(value, (list, tuple)) else value
+        if value is not self._value and not np.array_equal(value, self._value):
+            self._value = value
+            self._invalidate()
     
     _doc = "Read-Only Property"
     impedance = property(get_impedance, None, None, _doc)
@@ -69,16 +372,50 @@ class Component():
     symbolic_impedance = property(get_symbolic_impedance, None, None, _doc)
     symbolic_admittance = property(get_symbolic_admittance, None, None, _doc)
     del _doc
+    symbol = property(get_symbol, None, None, "Symbol of the Component, created on first access")
+    value = property(get_value, set_value, None, "Value of the Component")
 
     def __init__(self, name, value):
         self.name = name
-        self.symbol = ee_symbol(name)
-        self.value = value
+        self._symbol = None
+        self._value = np.asarray(value, dtype = float) if isinstance(value, (list, tuple)) else value
+        self._parents = weakref.WeakSet() # Systems containing the Component, notified on changes
         self._impedance = None
         self._admittance = None
         self._symbolic_impedance = None
         self._symbolic_admittance = None
 
+    def __getstate__(self):
+        # weak references can't be pickled, the Systems containing the Component add themselves on unpickling
+        return {slot: getattr(self, slot) for cls in type(self).__mro__ for slot in getattr(cls, "__slots__", ())
+            if slot not in ("_parents", "__weakref__") and hasattr(self, slot)}
+
+    def __setstate__(self, state):
+        self._parents = weakref.WeakSet()
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+    def _clear(self):
+        """Drop the cached properties of the Component itself
+        """
+        self._impedance = None
+        self._admittance = None
+        self._symbolic_impedance = None
+        self._symbolic_admittance = None
+
+    def _invalidate(self):
+        """Drop all cached properties of the Component and of all Systems containing it
+        Systems reachable over several paths are cleared only once
+        """
+        pending, visited = [self], {self}
+        while pending:
+            cmp = pending.pop()
+            cmp._clear()
+            for parent in cmp._parents:
+                if parent not in visited:
+                    visited.add(parent)
+                    pending.append(parent)
+
     def __str__(self):
         return "{class_} {name} = {value}".format(class_ = self.__class__.__name__, name = self.name, value = self.value)
 
@@ -86,17 +423,23 @@ class Resistor(Component):
     """Resistive load
     
     """
+    __slots__ = ()
+
     def get_impedance(self):
-        self._impedance = self.value
+        if self._impedance is None:
+            self._impedance = self.value
         return self._impedance
     def get_admittance(self):
-        self._admittance = 1/self.value
+        if self._admittance is None:
+            self._admittance = 1/self.value
         return self._admittance
     def get_symbolic_impedance(self):
-        self._symbolic_impedance = self.symbol
+        if self._symbolic_impedance is None:
+            self._symbolic_impedance = self.symbol
         return self._symbolic_impedance
     def get_symbolic_admittance(self):
-        self._symbolic_admittance = 1/self.symbol
+        if self._symbolic_admittance is None:
+            self._symbolic_admittance = 1/self.symbol
         return self._symbolic_admittance
 
     _doc = "Read-Only Property"
@@ -109,18 +452,47 @@ class Resistor(Component):
     def __init__(self, name, value):
         super().__init__(name, value)
 
+    def _emit(self, compiled):
+        """Append the evaluation step of the Resistor to a :CompiledSystem:
+        Returns:
+            int: slot of the result
+        """
+        return compiled._leaf("R", self)
+
 class FrequencyDependentComponent(Component):
     """General frequency dependant resistor
     Attributes:
-        frequency (sp.core.symbol.Symbol): Symbol of the frequency of the system
+        frequency (sp.core.symbol.Symbol): Symbol of the frequency of the system, created on first access
     """
+    __slots__ = ("_frequency",)
+
+    def get_frequency(self):
+        if isinstance(self._frequency, str):
+            self._frequency = ee_symbol(self._frequency)
+        return self._frequency
+    def set_frequency(self, frequency):
+        if _name(frequency) != _name(self._frequency):
+            self._frequency = frequency
+            self._invalidate()
+
+    frequency = property(get_frequency, set_frequency, None, "Symbol of the frequency of the system")
+
     def __init__(self, name, value, frequency):
         """
         Args:
             frequency (str or sp.core.symbol.Symbol): Frequency that's to be used in expressions of the Component
         """
         super().__init__(name, value)
-        self.frequency = frequency if isinstance(frequency, sp.Symbol) else ee_symbol(frequency)
+        self._frequency = frequency
+
+    def _emit(self, compiled):
+        """Append the evaluation step of the Component to a :CompiledSystem:
+        Returns:
+            int: slot of the result
+        """
+        if compiled.frequency is not None and _name(self._frequency) != compiled.frequency:
+            raise ValueError("Component {} depends on {} instead of {}".format(self.name, _name(self._frequency), compiled.frequency))
+        return compiled._leaf(self._kind, self)
 
 class Capacitor(FrequencyDependentComponent):
     """Capacitive Load
@@ -130,17 +502,24 @@ class Capacitor(FrequencyDependentComponent):
         symbolic_impedance (sp.core.symbol.Symbol): Impedance of the Component as symbolic expression - Can be Complex
         symbolic_admittance (sp.core.symbol.Symbol): Admittance of the Component as symbolic expression - Can be Complex
     """
+    __slots__ = ()
+    _kind = "C"
+
     def get_impedance(self):
-        self._impedance = -1*sp.I/(2*np.pi*self.frequency*self.value)
+        if self._impedance is None:
+            self._impedance = -1*sp.I/(2*np.pi*self.frequency*self.value)
         return self._impedance
     def get_admittance(self):
-        self._admittance = 1*sp.I*2*np.pi*self.frequency*self.value
+        if self._admittance is None:
+            self._admittance = 1*sp.I*2*np.pi*self.frequency*self.value
         return self._admittance
     def get_symbolic_impedance(self):
-        self._symbolic_impedance = -1*sp.I/(2*sp.pi*self.frequency*self.symbol)
+        if self._symbolic_impedance is None:
+            self._symbolic_impedance = -1*sp.I/(2*sp.pi*self.frequency*self.symbol)
         return self._symbolic_impedance
     def get_symbolic_admittance(self):
-        self._symbolic_admittance = 1*sp.I*2*sp.pi*self.frequency*self.symbol
+        if self._symbolic_admittance is None:
+            self._symbolic_admittance = 1*sp.I*2*sp.pi*self.frequency*self.symbol
         return self._symbolic_admittance
 
     _doc = "Read-Only Property"
@@ -161,17 +540,24 @@ class Inductance(FrequencyDependentComponent):
         symbolic_impedance (sp.core.symbol.Symbol): Impedance of the Component as symbolic expression - Can be Complex
         symbolic_admittance (sp.core.symbol.Symbol): Admittance of the Component as symbolic expression - Can be Complex
     """
+    __slots__ = ()
+    _kind = "L"
+
     def get_impedance(self):
-        self._impedance = 1*sp.I*2*np.pi*self.frequency*self.value
+        if self._impedance is None:
+            self._impedance = 1*sp.I*2*np.pi*self.frequency*self.value
         return self._impedance
     def get_admittance(self):
-        self._admittance = -1*sp.I/(2*np.pi*self.frequency*self.value)
+        if self._admittance is None:
+            self._admittance = -1*sp.I/(2*np.pi*self.frequency*self.value)
         return self._admittance
     def get_symbolic_impedance(self):
-        self._symbolic_impedance = 1*sp.I*2*sp.pi*self.frequency*self.symbol
+        if self._symbolic_impedance is None:
+            self._symbolic_impedance = 1*sp.I*2*sp.pi*self.frequency*self.symbol
         return self._symbolic_impedance
     def get_symbolic_admittance(self):
-        self._symbolic_admittance = -1*sp.I/(2*sp.pi*self.frequency*self.symbol)
+        if self._symbolic_admittance is None:
+            self._symbolic_admittance = -1*sp.I/(2*sp.pi*self.frequency*self.symbol)
         return self._symbolic_admittance
 
     _doc = "Read-Only Property"
@@ -188,6 +574,8 @@ class System(Component):
     """Represents parallel or series circuitry of electrical components and subsystems
 
     """
+    __slots__ = ("_compiled", "_impedances", "_mode", "_components")
+
     def _modecheck(self):
         """Check if current mode is a valid configuration/circuit
             Prevents stuff like mode = "wrongmode"
@@ -197,7 +585,8 @@ class System(Component):
 
     def _refresh(self, property_):
         """Refresh a property
-        In case the components changed since instantiation a correct value is assured
+        The property is only recalculated if mode, components or one of the subcomponents changed since
+        it was last calculated
         Args:
             property_ (string): Name of the property that's to be updated
         Returns:
@@ -207,6 +596,8 @@ class System(Component):
         admittances = ("admittance", "symbolic_admittance")
         self._modecheck()
         internal_property = "_"+property_
+        if getattr(self, internal_property) is not None:
+            return getattr(self, internal_property)
         if self.mode == "series" and property_ in impendaces or self.mode == "parallel" and property_ in admittances:
             sum_ = sum(getattr(cmp, property_) for cmp in self.components)
         else:
@@ -231,6 +622,23 @@ class System(Component):
         return self._refresh("symbolic_impedance")
     def get_symbolic_admittance(self):
         return self._refresh("symbolic_admittance")
+    def get_mode(self):
+        return self._mode
+    def set_mode(self, mode):
+        if mode != self._mode:
+            self._mode = mode
+            self._invalidate()
+    def get_components(self):
+        return self._components
+    def set_components(self, components):
+        components = tuple(components)
+        if components != self._components:
+            for cmp in self._components:
+                cmp._parents.discard(self)
+            for cmp in components:
+                cmp._parents.add(self)
+            self._components = components
+            self._invalidate()
     
     _doc = "Read-Only Property"
     impedance = property(get_impedance, None, None, _doc)
@@ -238,6 +646,8 @@ class System(Component):
     symbolic_impedance = property(get_symbolic_impedance, None, None, _doc)
     symbolic_admittance = property(get_symbolic_admittance, None, None, _doc)
     del _doc
+    mode = property(get_mode, set_mode, None, "Either 'series' or 'parallel'")
+    components = property(get_components, set_components, None, "Tuple of all the components in the circuit, including subsystems")
 
     def __init__(self, name, components, mode = "series", ):
         """
@@ -247,17 +657,32 @@ class System(Component):
             mode (str): Either 'series' or 'parallel'. Calculations are done based upon current mode.
         """
         super().__init__(name, None)
-        del self.value # Systems don't have a value
-        self.mode = mode
+        del self._value # Systems don't have a value
+        self._compiled = {}
+        self._impedances = {}
+        self._mode = mode
+        self._components = ()
         self.components = components
 
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        for cmp in self._components:
+            cmp._parents.add(self)
+
+    def _clear(self):
+        """Drop the cached properties and compiled evaluators of the System itself
+        """
+        self._compiled = {}
+        self._impedances = {}
+        super()._clear()
+
     def __str__(self):
         return """System {name} with Components {cmp}
         Configuration = {mode}
         Equations are:
         Impedance: {imp}
         Admittance: {admt}
-        """.format(name = self.name, cmp = list(map(lambda s: str(s), self.components)), imp = self.symbolic_impedance, admt = self.symbolic_admittance, mode = self.mode)
+        """.format(name = self.name, cmp = "[{}]".format(", ".join(map(str, self.components))), imp = self.symbolic_impedance, admt = self.symbolic_admittance, mode = self.mode)
 
     def resonance(self, frequency):
         """Get resonance frequency of system
@@ -268,7 +693,285 @@ class System(Component):
         """
         abs_ = sp.Abs(self.impedance)
         derivative = sp.diff(abs_, frequency)
-        return mpmath.findroot(sp.lambdify(frequency, derivative), 1)
+        return mpmath.findroot(lambdify(frequency, derivative), 1)
+
+    def resonances(self, start, stop, frequency = None, points = 2000, xtol = 1e-12):
+        """Find all resonance and anti-resonance frequencies of the System in a frequency band
+        |Z| is sampled on a logarithmic grid, every local extremum is bracketed by its neighbours and refined
+        by bisection of the derivative of log|Z| over log(f), all brackets at once
+        Args:
+            start (numeric): [Hz] Lower end of the band, has to be positive
+            stop (numeric): [Hz] Upper end of the band
+            frequency (sp.core.symbol.Symbol or None): Symbol of the frequency of the system
+            points (int): Number of samples of the grid, extrema closer than one grid step can be missed
+            xtol (float): Relative precision of the found frequencies
+        Returns:
+            Resonances: nparray of frequencies where |Z| has a minimum (resonances) and
+                nparray of frequencies where |Z| has a maximum (anti-resonances)
+        """
+        if not 0 < start < stop:
+            raise ValueError("Band has to satisfy 0 < start < stop")
+        compiled = self.compile(frequency)
+        if any(np.ndim(value) for value in compiled.values):
+            raise ValueError("Resonances need a single value for every component")
+        step = 1e-6*max(1, abs(np.log(start)), abs(np.log(stop))) # for the derivative, in log(f)
+        def log_abs(x):
+            with np.errstate(divide = "ignore"):
+                return np.log(np.abs(compiled.impedance(np.exp(x))))
+        def slope(x):
+            return log_abs(x+step)-log_abs(x-step)
+        x = np.linspace(np.log(start), np.log(stop), points)
+        difference = np.diff(log_abs(x))
+        found = []
+        for sign in (-1, 1): # minima, then maxima
+            index = np.nonzero((sign*difference[:-1] > 0) & (sign*difference[1:] < 0))[0]
+            if not len(index): # no extremum in the band
+                found.append(np.empty(0))
+                continue
+            low, high = x[index], x[index+2]
+            for _ in range(int(np.ceil(np.log2((x[2]-x[0])/xtol)))):
+                mid = (low+high)/2
+                rising = sign*slope(mid) > 0
+                low = np.where(rising, mid, low)
+                high = np.where(rising, high, mid)
+            found.append(np.exp((low+high)/2))
+        return Resonances(*found)
+
+    def compile(self, frequency = None):
+        """Compile the System into a numeric evaluator
+        The component tree is walked once, the evaluator then only does vectorized NumPy operations
+        Args:
+            frequency (str or sp.core.symbol.Symbol or None): Symbol (or its name) of the frequency of the system.
+                If given all frequency dependent components have to use it
+        Returns:
+            :CompiledSystem: Evaluator for impedance and admittance over frequency arrays
+        """
+        frequency = _name(frequency)
+        if frequency not in self._compiled:
+            self._compiled[frequency] = CompiledSystem(self, frequency)
+        return self._compiled[frequency]
+
+    def _impedance_at(self, frequencies):
+        """Impedance at single frequencies
+        Values are cached per frequency until the System changes, so circuits sharing harmonics evaluate them once.
+        Components have to be scalar, array values only work with sweep()
+        Args:
+            frequencies (iterable of float): [Hz] Frequencies to evaluate at
+        Returns:
+            nparray: complex impedance for every frequency
+        """
+        frequencies = [float(frequency) for frequency in frequencies]
+        missing = [frequency for frequency in set(frequencies) if frequency not in self._impedances]
+        if missing:
+            compiled = self.compile()
+            if any(np.ndim(value) for value in compiled.values):
+                raise ValueError("Phasors need a single value for every component, use sweep() for array values")
+            self._impedances.update(zip(missing, compiled.impedance(np.array(missing))))
+        return np.array([self._impedances[frequency] for frequency in frequencies], dtype = complex)
+
+    def sweep(self, frequencies, frequency = None, voltage = 1):
+        """Calculate the System for a whole frequency band at once
+        Args:
+            frequencies (nparray): [Hz] Frequencies to evaluate at
+            frequency (sp.core.symbol.Symbol or None): Symbol of the frequency of the system
+            voltage (numeric): [V] Voltage phasor applied to the System
+        Returns:
+            SweepResult: complex arrays of impedance, admittance, current and voltage for every frequency,
+                with array valued components of shape (*value shape, *frequency shape)
+        """
+        frequencies = np.asarray(frequencies, dtype = float)
+        compiled = self.compile(frequency)
+        impedance = compiled.impedance(frequencies)
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            admittance = 1/impedance
+        voltage = np.zeros(frequencies.shape, dtype = complex) + voltage
+        return SweepResult(frequencies, impedance, admittance, voltage*admittance, voltage)
+
+    def _tolerance_statistics(self, frequencies, frequency, values, mode, percentiles, processes, chunksize):
+        """Evaluate the System for arrays of component values and get statistics of the magnitude
+        Args:
+            values (dict): Name of the component: nparray of its values, all of the same length
+        Returns:
+            ToleranceResult
+        """
+        frequencies = np.asarray(frequencies, dtype = float)
+        compiled = self.compile(frequency)
+        n = len(next(iter(values.values())))
+        if chunksize is None:
+            chunksize = max(1, 2**22//max(1, frequencies.size))
+        chunks = [{name: value[i:i+chunksize] for name, value in values.items()} for i in range(0, n, chunksize)]
+        if processes is None or processes == 1:
+            magnitudes = [_tolerance_chunk(compiled, frequencies, chunk, mode) for chunk in chunks]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers = processes) as pool:
+                magnitudes = list(pool.map(_tolerance_chunk, itertools.repeat(compiled), itertools.repeat(frequencies), chunks, itertools.repeat(mode)))
+        magnitudes = np.concatenate(magnitudes)
+        return ToleranceResult(frequencies, n, magnitudes.mean(axis = 0), magnitudes.std(axis = 0),
+            {p: np.percentile(magnitudes, p, axis = 0) for p in percentiles})
+
+    def _tolerances(self, tolerance, frequency):
+        """Get nominal value and tolerance of every component
+        Args:
+            tolerance (float or dict): Relative tolerance of all components or name of the component: tolerance.
+                Components not in the dict are kept at their nominal value
+        Returns:
+            dict: Name of the component: (nominal value, tolerance)
+        """
+        compiled = self.compile(frequency)
+        nominal = dict(zip(compiled.names, compiled.values))
+        if isinstance(tolerance, dict):
+            tolerance = {key if isinstance(key, str) else key.name: value for key, value in tolerance.items()}
+            if not set(tolerance).issubset(nominal):
+                raise ValueError("Tolerance contains components that are not in the system")
+            return {name: (nominal[name], tol) for name, tol in tolerance.items()}
+        return {name: (value, tolerance) for name, value in nominal.items()}
+
+    def monte_carlo(self, frequencies, tolerance = 0.05, samples = 10000, frequency = None, mode = "impedance", \
+        distribution = "uniform", percentiles = (5, 50, 95), processes = None, chunksize = None, seed = None):
+        """Monte Carlo tolerance analysis of the System
+        Component values are drawn randomly around their nominal value and the magnitude of the impedance
+        (or admittance) is evaluated for all samples and frequencies at once
+        Args:
+            frequencies (nparray): [Hz] Frequencies to evaluate at
+            tolerance (float or dict): Relative tolerance of all components (0.05 is ±5%) or
+                name or symbol of the component: tolerance
+            samples (int): Number of samples
+            frequency (sp.core.symbol.Symbol or None): Symbol of the frequency of the system
+            mode (str): decides if impedance or admittance is evaluated
+            distribution (str): "uniform" over the tolerance band or "normal" with the tolerance as 3 sigma
+            percentiles (iterable of numeric): Percentiles to calculate
+            processes (int or None): Number of worker processes, standart is evaluation in this process
+            chunksize (int or None): Number of samples evaluated at once
+            seed (int or None): Seed of the random number generator
+        Returns:
+            ToleranceResult: frequencies, number of samples and mean, standart deviation and
+                percentiles (dict percentile: nparray) of the magnitude for every frequency
+        """
+        rng = np.random.default_rng(seed)
+        values = {}
+        for name, (nominal, tol) in self._tolerances(tolerance, frequency).items():
+            if distribution == "uniform":
+                deviation = rng.uniform(-tol, tol, samples)
+            elif distribution == "normal":
+                deviation = rng.normal(0, tol/3, samples)
+            else:
+                raise ValueError("Selected distribution doesn't exist")
+            values[name] = nominal*(1+deviation)
+        return self._tolerance_statistics(frequencies, frequency, values, mode, percentiles, processes, chunksize)
+
+    def corners(self, frequencies, tolerance = 0.05, frequency = None, mode = "impedance", percentiles = (0, 100), \
+        processes = None, chunksize = None, max_corners = 2**16):
+        """Corner analysis of the System
+        Evaluates all combinations of the components at the lower and upper end of their tolerance band.
+        The number of corners doubles with every toleranced component, use monte_carlo() for large Systems
+        Args:
+            frequencies (nparray): [Hz] Frequencies to evaluate at
+            tolerance (float or dict): Relative tolerance of all components (0.05 is ±5%) or
+                name or symbol of the component: tolerance
+            frequency (sp.core.symbol.Symbol or None): Symbol of the frequency of the system
+            mode (str): decides if impedance or admittance is evaluated
+            percentiles (iterable of numeric): Percentiles to calculate, standart is the envelope
+            processes (int or None): Number of worker processes, standart is evaluation in this process
+            chunksize (int or None): Number of corners evaluated at once
+            max_corners (int): Largest allowed number of corners, a ValueError is raised above it
+        Returns:
+            ToleranceResult: frequencies, number of corners and mean, standart deviation and
+                percentiles (dict percentile: nparray) of the magnitude for every frequency
+        """
+        tolerances = self._tolerances(tolerance, frequency)
+        if 2**len(tolerances) > max_corners:
+            raise ValueError("{} toleranced components give {} corners, more than max_corners = {}".format(
+                len(tolerances), 2**len(tolerances), max_corners))
+        bits = np.arange(len(tolerances))[::-1] # the first component changes slowest
+        signs = ((np.arange(2**len(tolerances))[:, None] >> bits) & 1)*2.0-1
+        values = {name: nominal*(1+tol*signs[:, i]) for i, (name, (nominal, tol)) in enumerate(tolerances.items())}
+        return self._tolerance_statistics(frequencies, frequency, values, mode, percentiles, processes, chunksize)
+
+    def bode(self, start, stop, frequency = None, mode = "impedance", points = 50, magnitude_tolerance = 0.1, \
+        phase_tolerance = 1, max_points = 10**5):
+        """Calculate the data of a bode plot with adaptive sampling
+        Starting from a logarithmic grid, every interval is halved (in log(f)) as long as its midpoint deviates
+        from the straight line between its ends, so asymptotes stay coarse and resonances are resolved finely
+        Args:
+            start (numeric): [Hz] Lower end of the band, has to be positive
+            stop (numeric): [Hz] Upper end of the band
+            frequency (sp.core.symbol.Symbol or None): Symbol of the frequency of the system
+            mode (str): decides if impedance or admittance is calculated
+            points (int): Number of points of the initial grid
+            magnitude_tolerance (float): [dB] Allowed deviation of the magnitude from a straight line
+            phase_tolerance (float): [°] Allowed deviation of the phase from a straight line
+            max_points (int): Refinement stops once the result has more points
+        Returns:
+            Bode: nparrays of the frequencies, the magnitude and the phase in degrees
+        """
+        if not 0 < start < stop:
+            raise ValueError("Band has to satisfy 0 < start < stop")
+        compiled = self.compile(frequency)
+        if mode not in ("impedance", "admittance"):
+            raise ValueError("Selected mode doesn't exist")
+        if any(np.ndim(value) for value in compiled.values):
+            raise ValueError("Bode plots need a single value for every component")
+        evaluate = compiled.impedance if mode == "impedance" else compiled.admittance
+        def wrap(phase):
+            return (phase+180)%360-180
+        def sample(x):
+            values = evaluate(10**x)
+            with np.errstate(divide = "ignore"):
+                return 20*np.log10(np.abs(values)), np.angle(values, deg = True)
+        x = np.linspace(np.log10(start), np.log10(stop), max(2, points))
+        magnitude, phase = sample(x)
+        low, high = np.arange(len(x)-1), np.arange(1, len(x)) # intervals to check as indices into x
+        magnitudes, phases = magnitude, phase
+        while len(low) and len(x) < max_points:
+            middle = (x[low]+x[high])/2
+            magnitude, phase = sample(middle)
+            with np.errstate(invalid = "ignore"):
+                deviation = np.abs(magnitude-(magnitudes[low]+magnitudes[high])/2)
+                refine = ~(deviation <= magnitude_tolerance) # nan at poles and zeros refines as well
+            refine |= np.abs(wrap(phase-phases[low]-wrap(phases[high]-phases[low])/2)) > phase_tolerance
+            refine &= x[high]-x[low] > 1e-9 # discontinuities can't be resolved any further
+            # both halves of a refined interval are checked again in the next pass
+            new = len(x)+np.arange(np.count_nonzero(refine))
+            low, high = np.concatenate((low[refine], new)), np.concatenate((new, high[refine]))
+            x = np.concatenate((x, middle[refine]))
+            magnitudes = np.concatenate((magnitudes, magnitude[refine]))
+            phases = np.concatenate((phases, phase[refine]))
+        order = np.argsort(x)
+        return Bode(10**x[order], 10**(magnitudes[order]/20), phases[order])
+
+    def to_transfer_function(self, frequency = None, mode = "impedance"):
+        """Get the System as rational function of s = j*2*pi*f
+        Evaluating the polynomials is cheap and poles and zeros of the System are available via np.roots
+        Args:
+            frequency (sp.core.symbol.Symbol or None): Symbol of the frequency of the system
+            mode (str): decides if impedance or admittance is described
+        Returns:
+            :TransferFunction: coefficients of numerator and denominator, highest power first
+        """
+        transfer_function = self.compile(frequency).transfer_function()
+        if mode == "impedance":
+            return transfer_function
+        elif mode == "admittance":
+            return transfer_function.inverse()
+        else:
+            raise ValueError("Selected mode doesn't exist")
+
+    def _emit(self, compiled):
+        """Append the evaluation steps of the System and all its subcomponents to a :CompiledSystem:
+        Returns:
+            int: slot of the result
+        """
+        if id(self) in compiled._emitted: # Systems shared by several parents are only walked once
+            return compiled._emitted[id(self)]
+        self._modecheck()
+        slots = tuple(cmp._emit(compiled) for cmp in self.components)
+        if len(slots) == 1: # a single component is the same in series and in parallel
+            slot = slots[0]
+        else:
+            slots = tuple(sorted(slots)) # both connections are commutative
+            slot = compiled._step((self.mode, slots), (self.mode, slots))
+        compiled._emitted[id(self)] = slot
+        return slot
 
     def _nyquist(self, range_, frequency, mode):
         """Plot a nyquist plot for the System
@@ -285,24 +988,36 @@ class System(Component):
             range_ = range_[1:]
         elif range_[0] < 0:
             return None
-        frequencyband = range_
-        if mode == "impedance":
-            lambda_func = sp.lambdify(frequency, self.impedance)
-        elif mode == "admittance":
-            lambda_func = sp.lambdify(frequency, self.admittance)
-        else:
-            raise ValueError("Selected mode doesn't exist")
-        lambda_func = np.vectorize(lambda_func)
-        nyquist = lambda_func(frequencyband)
+        frequencyband, nyquist = self.nyquist_data(range_, frequency, mode)
 
         plt.plot(nyquist.real, nyquist.imag)
-        arrows = np.asarray([nyquist[i] for i in range(len(nyquist)) if not i%5])
+        arrows = nyquist[::5]
         plt.plot(arrows.real, arrows.imag, "<-")
         plt.ylabel(r"Im[{}]/$\Omega$".format(self.name) if mode == "impedance" else r"Im[{}]/$S$".format(self.name))
         plt.xlabel(r"Re[{}]/$\Omega$".format(self.name) if mode == "impedance" else r"Re[{}]/$S$".format(self.name))
         plt.gcf().canvas.set_window_title("{} {}".format(mode, self.name))
         plt.show()
 
+    def nyquist_data(self, range_, frequency = None, mode = "impedance"):
+        """Calculate the data of a nyquist plot for the System
+        Args:
+            range_ (range object or nparray): Range for the frequency/frequencyband
+            frequency (sp.core.symbol.Symbol or None): Symbol of the frequency of the system
+            mode (str): decides if impedance or admittance is calculated
+        Returns:
+            Tuple:
+                (nparray of frequencies,
+                nparray of complex impedance or admittance)
+        """
+        frequencyband = np.asarray(range_, dtype = float)
+        compiled = self.compile(frequency)
+        if mode == "impedance":
+            return (frequencyband, compiled.impedance(frequencyband))
+        elif mode == "admittance":
+            return (frequencyband, compiled.admittance(frequencyband))
+        else:
+            raise ValueError("Selected mode doesn't exist")
+
     def nyquist(self, range_, frequency, mode = "impedance"):
         """Plot a nyquist plot for the System in a new process
         Args:
@@ -319,6 +1034,258 @@ class System(Component):
         p.start()
         return p
 
+def _capacitor(omega, value):
+    """Impedance of capacitors, Z = -inf*j at 0Hz instead of nan
+    """
+    reactance = -1/(omega*value)
+    result = np.zeros(reactance.shape, dtype = complex)
+    result.imag = reactance
+    return result
+
+def _parallel(impedances):
+    """Impedance of a parallel connection, shorted if one of the impedances is 0
+    """
+    result = 1/sum(1/impedance for impedance in impedances)
+    shorted = functools.reduce(np.logical_or, (impedance == 0 for impedance in impedances))
+    return np.where(shorted, 0, result)
+
+def _last_uses(program):
+    """Get the slots that are used for the last time by every step of a :CompiledSystem: program
+    Slots of identical subtrees are used by several steps, so they can only be freed after their last use
+    Args:
+        program (list of tuple): The program
+    Returns:
+        list of list of int: slots that can be freed after every step
+    """
+    last = {}
+    for step, (op, arg) in enumerate(program):
+        if op in ("series", "parallel"):
+            for slot in arg:
+                last[slot] = step
+    frees = [[] for _ in program]
+    for slot, step in sorted(last.items()):
+        frees[step].append(slot)
+    return frees
+
+class CompiledSystem():
+    """Numeric evaluator of a :System:
+    Holds the component tree as a flat program of NumPy operations, each one working on whole frequency arrays.
+    Identical subtrees (same modes, component kinds, names and values, in any order) are only evaluated once
+    Attributes:
+        name (str): Name of the compiled System
+        frequency (str or None): Name of the frequency symbol the System was compiled for
+        names (list of str): Names of the distinct components in evaluation order
+        values (list of numeric or nparray): Values of the distinct components in evaluation order
+    """
+    def __init__(self, system, frequency = None):
+        """
+        Args:
+            system (:System:): System to compile
+            frequency (str or sp.core.symbol.Symbol or None): Symbol (or its name) of the frequency of the system
+        """
+        self.name = system.name
+        self.frequency = _name(frequency)
+        self.names = []
+        self.values = []
+        self._program = []
+        self._slots = {} # canonical key of every subtree: its slot
+        self._emitted = {} # id of every System walked so far: its slot
+        result = system._emit(self)
+        if result != len(self._program)-1: # the result is always the last slot
+            self._program.append(("series", (result,)))
+        del self._slots, self._emitted
+        self._indices = collections.defaultdict(list) # name: indices into values, for overrides by name
+        for i, name in enumerate(self.names):
+            self._indices[name].append(i)
+        self._indices = dict(self._indices)
+
+    def _leaf(self, kind, component):
+        """Append a single component to the program
+        Args:
+            kind (str): "R", "C" or "L"
+            component (:Component:): The component
+        Returns:
+            int: slot of the result
+        """
+        value = component.value
+        if np.ndim(value): # arrays are compared by identity
+            value = id(value)
+        elif isinstance(value, np.ndarray): # 0-d arrays aren't hashable
+            value = value.item()
+        # the name is part of the key, so value overrides by name still affect exactly the right components
+        key = (kind, component.name, value)
+        if key not in self._slots: # identical components share one value
+            self.names.append(component.name)
+            self.values.append(component.value)
+        return self._step(key, (kind, len(self.values)-1))
+
+    def _step(self, key, step):
+        """Append a step to the program unless an identical one exists
+        Args:
+            key (tuple): Canonical key of the subtree calculated by the step
+            step (tuple): (operation, argument)
+        Returns:
+            int: slot of the result
+        """
+        if key not in self._slots:
+            self._program.append(step)
+            self._slots[key] = len(self._program)-1
+        return self._slots[key]
+
+    def _values(self, values, ndim):
+        """Get the component values used for an evaluation
+        Values are reshaped so they broadcast against the frequencies, the result has the shape
+        (*value shape, *frequency shape)
+        Args:
+            values (dict or None): Name or symbol of the component: value or nparray of values
+            ndim (int): Number of dimensions of the frequencies
+        Returns:
+            list of nparray: values in evaluation order
+        """
+        result = list(self.values)
+        for key, value in (values or {}).items():
+            name = key if isinstance(key, str) else key.name
+            if name not in self._indices:
+                raise ValueError("{} is not a component of {}".format(name, self.name))
+            for i in self._indices[name]:
+                result[i] = value
+        reshaped = {} # an override of several components is only reshaped once
+        for i, value in enumerate(result):
+            if id(value) not in reshaped:
+                reshaped[id(value)] = np.reshape(value, np.shape(value)+(1,)*ndim)
+            result[i] = reshaped[id(value)]
+        return result
+
+    def impedance(self, frequencies, values = None):
+        """Evaluate the impedance
+        Args:
+            frequencies (numeric or nparray): [Hz] Frequencies to evaluate at
+            values (dict or None): Name or symbol of the component: value or nparray of values that replace
+                the value of the component
+        Returns:
+            nparray: complex impedance for every frequency, shape (*value shape, *frequency shape)
+        """
+        f = np.asarray(frequencies, dtype = float)
+        values = self._values(values, f.ndim)
+        omega = 2*np.pi*f
+        slots = []
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            for (op, arg), frees in zip(self._program, _last_uses(self._program)):
+                if op == "R":
+                    result = np.zeros(f.shape, dtype = complex) + values[arg]
+                elif op == "L":
+                    result = 1j*omega*values[arg]
+                elif op == "C":
+                    result = _capacitor(omega, values[arg])
+                elif op == "series":
+                    result = sum(slots[i] for i in arg)
+                else:
+                    result = _parallel([slots[i] for i in arg])
+                for i in frees:
+                    slots[i] = None # free intermediate arrays after their last use
+                slots.append(result)
+        return slots[-1]
+
+    def admittance(self, frequencies, values = None):
+        """Evaluate the admittance
+        Args:
+            frequencies (numeric or nparray): [Hz] Frequencies to evaluate at
+            values (dict or None): Name or symbol of the component: value or nparray of values that replace
+                the value of the component
+        Returns:
+            nparray: complex admittance for every frequency, shape (*value shape, *frequency shape)
+        """
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            return 1/self.impedance(frequencies, values)
+
+    def __call__(self, frequencies, values = None):
+        return self.impedance(frequencies, values)
+
+    def transfer_function(self):
+        """Get the impedance as rational function of s = j*2*pi*f
+        Transfer functions are cached by program and values, see TransferFunctionCache
+        Returns:
+            :TransferFunction: coefficients of numerator and denominator, highest power first
+        """
+        if any(np.ndim(value) for value in self.values):
+            raise ValueError("Transfer functions need a single value for every component")
+        return transfer_functions(self)
+
+    def _transfer_function(self):
+        """Derive the transfer function
+        The program is evaluated once with polynomial instead of array arithmetic
+        Returns:
+            :TransferFunction: coefficients of numerator and denominator, highest power first
+        """
+        slots = []
+        frees = _last_uses(self._program)
+        for op, arg in self._program:
+            if op == "R":
+                result = (np.array([self.values[arg]], dtype = float), np.ones(1))
+            elif op == "L":
+                result = (np.array([self.values[arg], 0], dtype = float), np.ones(1))
+            elif op == "C":
+                result = (np.ones(1), np.array([self.values[arg], 0], dtype = float))
+            else:
+                # series: n/d = sum(n_i/d_i), parallel: d/n = sum(d_i/n_i)
+                first, second = (0, 1) if op == "series" else (1, 0)
+                parts = [slots[i] for i in arg]
+                product = functools.reduce(np.polymul, (part[second] for part in parts))
+                sum_ = functools.reduce(np.polyadd, (functools.reduce(np.polymul,
+                    [part[first]]+[other[second] for j, other in enumerate(parts) if j != i]) for i, part in enumerate(parts)))
+                result = (sum_, product) if op == "series" else (product, sum_)
+            for i in frees[len(slots)]:
+                slots[i] = None
+            slots.append(result)
+        return TransferFunction(*slots[-1])._reduced()
+
+class TransferFunction(collections.namedtuple("TransferFunction", ("numerator", "denominator"))):
+    """Rational function of s = j*2*pi*f
+    Attributes:
+        numerator (nparray): Coefficients of the numerator, highest power first
+        denominator (nparray): Coefficients of the denominator, highest power first
+        poles (nparray): [1/s] Complex roots of the denominator
+        zeros (nparray): [1/s] Complex roots of the numerator
+    """
+    __slots__ = ()
+
+    def _reduced(self):
+        """Cancel common powers of s and normalize the denominator to a leading coefficient of 1
+        Returns:
+            :TransferFunction:
+        """
+        numerator, denominator = np.trim_zeros(self.numerator, "f"), np.trim_zeros(self.denominator, "f")
+        common = min(len(numerator)-len(np.trim_zeros(numerator, "b")), len(denominator)-len(np.trim_zeros(denominator, "b")))
+        if common:
+            numerator, denominator = numerator[:-common], denominator[:-common]
+        return TransferFunction(numerator/denominator[0], denominator/denominator[0])
+
+    def get_poles(self):
+        return np.roots(self.denominator)
+    def get_zeros(self):
+        return np.roots(self.numerator)
+
+    poles = property(get_poles, None, None, "Read-Only Property")
+    zeros = property(get_zeros, None, None, "Read-Only Property")
+
+    def inverse(self):
+        """Get the reciprocal, e.g. the admittance of an impedance
+        Returns:
+            :TransferFunction:
+        """
+        return TransferFunction(self.denominator, self.numerator)._reduced()
+
+    def __call__(self, frequencies):
+        """Evaluate the function
+        Args:
+            frequencies (numeric or nparray): [Hz] Frequencies to evaluate at
+        Returns:
+            nparray: complex value for every frequency
+        """
+        s = 2j*np.pi*np.asarray(frequencies, dtype = float)
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            return np.polyval(self.numerator, s)/np.polyval(self.denominator, s)
+
 class VoltageSource():
     def __init__(self, name, mode, voltage, reference = 0 ):
         """Represents a general voltage source
@@ -335,6 +1302,32 @@ class VoltageSource():
         self.frequency = 0
         self.base_sources = (self,)
 
+    def phasors(self, harmonics = 51):
+        """Decompose the voltage into phasors
+        A phasor U of the frequency f describes the voltage Re(U*exp(j*2*pi*f*t)), the DC part has the frequency 0
+        Args:
+            harmonics (int): Highest harmonic used for non-sinusoidal waves
+        Returns:
+            list of tuple: (frequency, complex phasor)
+        """
+        return [(0, complex(self.voltage))]
+
+    def stream(self, start, stop, samplerate, chunksize = 2**16):
+        """Generate the voltage of the Source chunk by chunk
+        Arbitrarily long time spans can be processed without holding them in memory
+        Args:
+            start (numeric): [s] Time of the first sample
+            stop (numeric or None): [s] End of the time span (exclusive), None for an endless stream
+            samplerate (numeric): [Hz] Samples per second
+            chunksize (int): Samples per chunk, the last chunk can be shorter
+        Yields:
+            Tuple:
+                (nparray of times,
+                nparray of voltages)
+        """
+        for time in _chunks(start, stop, samplerate, chunksize):
+            yield (time, self.samples(time))
+
 class DCSource(VoltageSource):
     """DC Source for various waveforms
     Args:
@@ -344,7 +1337,7 @@ class DCSource(VoltageSource):
         reference (float): [V] Reference for voltage. Basically a DC-Offset
     """
     def __init__(self, name, voltage, reference, mode = "DC"):
-        super().__init__(self, mode, voltage, reference)
+        super().__init__(name, mode, voltage, reference)
     
     def _plot(self, range_):
         """Plot the voltage for the Source
@@ -352,11 +1345,7 @@ class DCSource(VoltageSource):
         Args:
             range_ (range object or nparray): Range for the time
         """
-        range_ = _checkrange(range_)
-
-        lambda_func = lambda x: self.voltage
-        lambda_func_vec = np.vectorize(lambda_func)
-        voltage = lambda_func_vec(range_)
+        range_, voltage = self.waveform(_checkrange(range_))
 
         plt.plot(range_, voltage)
         plt.ylabel(r"$u_{}/V$".format(self.name))
@@ -364,6 +1353,28 @@ class DCSource(VoltageSource):
         plt.gcf().canvas.set_window_title("{}".format(self.name))
         plt.show()
 
+    def waveform(self, range_):
+        """Calculate the voltage of the Source
+        Args:
+            range_ (range object or nparray): Range for the time
+        Returns:
+            Tuple:
+                (nparray of times,
+                nparray of voltages)
+        """
+        range_ = np.asarray(range_, dtype = float)
+        return (range_, self.samples(range_))
+
+    def samples(self, time, out = None):
+        """Calculate the voltage of the Source with NumPy
+        Args:
+            time (nparray): [s] times to calculate values at
+            out (nparray or None): float64 buffer of the shape of time that's filled with the values
+        Returns:
+            nparray: [V] voltage for every time
+        """
+        return _wave_samples(_wave(self), time, out)
+
     def plot(self, range_):
         """Plot the voltage for the Source
         Args:
@@ -456,6 +1467,61 @@ class ACSource(VoltageSource):
         exp = sp.floor(2*(time-phase)/T)
         return peak * sp.Pow(-1, exp) + reference
 
+    @staticmethod
+    def _sinewave_samples(peak, frequency, time, phase, reference, out = None):
+        """Numeric counterpart of _sinewave
+        Args:
+            time (nparray): [s] times to calculate values at
+            out (nparray or None): float64 buffer of the shape of time that's filled with the values
+        Returns:
+            nparray: values of the wave
+        """
+        out = _buffer(time, out)
+        np.multiply(time, 2*np.pi*frequency, out = out)
+        out += phase
+        np.sin(out, out = out)
+        out *= peak
+        out += reference
+        return out
+    @staticmethod
+    def _triwave_samples(peak, frequency, time, phase, reference, out = None):
+        """Numeric counterpart of _triwave
+        Args:
+            time (nparray): [s] times to calculate values at
+            out (nparray or None): float64 buffer of the shape of time that's filled with the values
+        Returns:
+            nparray: values of the wave
+        """
+        T = 1/frequency
+        out = _buffer(time, out)
+        np.subtract(time, T/4+phase*T/(2*np.pi), out = out)
+        out *= 2*frequency
+        np.mod(out, 2, out = out)
+        np.subtract(1, out, out = out)
+        np.maximum(out, -1, out = out)
+        np.abs(out, out = out)
+        out *= 2*peak
+        out += reference-peak
+        return out
+    @staticmethod
+    def _rectwave_samples(peak, frequency, time, phase, reference, out = None):
+        """Numeric counterpart of _rectwave
+        Args:
+            time (nparray): [s] times to calculate values at
+            out (nparray or None): float64 buffer of the shape of time that's filled with the values
+        Returns:
+            nparray: values of the wave
+        """
+        T = 1/frequency
+        out = _buffer(time, out)
+        np.subtract(time, phase, out = out)
+        out *= 2/T
+        np.floor(out, out = out)
+        np.mod(out, 2, out = out) # (-1)**exp = 1-2*(exp mod 2)
+        out *= -2*peak
+        out += peak+reference
+        return out
+
     @staticmethod
     def _check_sublist(lst1, lst2):
         """Check if a list contains one element from another list
@@ -507,7 +1573,7 @@ class ACSource(VoltageSource):
         self.frequency = frequency
         self.time = time
         self.phase = self._str_to_rad(phase)
-        self.period = 1/frequency
+        self.period = 1/frequency if frequency else None
         self.peakvoltage = peakvoltage
         
         if None in (symbolic_peakvoltage, symbolic_reference, symbolic_frequency):
@@ -518,25 +1584,28 @@ class ACSource(VoltageSource):
             self.symbolic_reference = symbolic_reference
             self.symbolic_frequency = symbolic_frequency
             if self.mode == "AC sine":
-                self.symbolic_voltage = self._sinewave(symbolic_peakvoltage, symbolic_frequency, time, self.phase, symbolic_reference)
+                self.symbolic_voltage = self._sinewave(symbolic_peakvoltage, symbolic_frequency, _symbol(time), self.phase, symbolic_reference)
             elif self.mode == "AC tri":
-                self.symbolic_voltage = self._triwave(symbolic_peakvoltage, symbolic_frequency, time, self.phase, symbolic_reference)
+                self.symbolic_voltage = self._triwave(symbolic_peakvoltage, symbolic_frequency, _symbol(time), self.phase, symbolic_reference)
             elif self.mode == "AC rect":
-                self.symbolic_voltage = self._rectwave(symbolic_peakvoltage, symbolic_frequency, time, self.phase, symbolic_reference)
+                self.symbolic_voltage = self._rectwave(symbolic_peakvoltage, symbolic_frequency, _symbol(time), self.phase, symbolic_reference)
             elif self.mode == "AC Mixed":
                 pass
             else:
                 raise ValueError("Selected mode doesn't exist")
-        if self.mode == "AC sine":
-            self.voltage = self._sinewave(peakvoltage, frequency, time, self.phase, reference)
-        elif self.mode == "AC tri":
-            self.voltage = self._triwave(peakvoltage, frequency, time, self.phase, reference)
-        elif self.mode == "AC rect":
-            self.voltage = self._rectwave(peakvoltage, frequency, time, self.phase, reference)
-        elif self.mode == "AC Mixed":
-            pass
-        else: 
+        if self.mode not in ("AC sine", "AC tri", "AC rect", "AC Mixed"):
             raise ValueError("Selected mode doesn't exist")
+        self._voltage = None # the equation is built on first access
+
+    def get_voltage(self):
+        if self._voltage is None:
+            waves = {"AC sine": self._sinewave, "AC tri": self._triwave, "AC rect": self._rectwave}
+            self._voltage = waves[self.mode](self.peakvoltage, self.frequency, _symbol(self.time), self.phase, self.reference)
+        return self._voltage
+    def set_voltage(self, voltage):
+        self._voltage = voltage
+
+    voltage = property(get_voltage, set_voltage, None, "Equation of the wave, SymPy is only used once it's accessed")
 
     def _plot(self, range_, time):
         """Plot the voltage for the Source
@@ -545,11 +1614,7 @@ class ACSource(VoltageSource):
             range_ (range object or nparray): Range for the time
             time (sp.core.symbol.Symbol): Symbol of the time of the system
         """
-        range_ = _checkrange(range_)
-
-        lambda_func = sp.lambdify(time, self.voltage)
-        lambda_func_vec = np.vectorize(lambda_func)
-        voltage = lambda_func_vec(range_)
+        range_, voltage = self.waveform(_checkrange(range_), time)
 
         plt.plot(range_, voltage)
         plt.ylabel(r"$u_{0}/V$".format(self.name))
@@ -557,6 +1622,30 @@ class ACSource(VoltageSource):
         plt.gcf().canvas.set_window_title("{}".format(self.name))
         plt.show()
 
+    def waveform(self, range_, time = None):
+        """Calculate the voltage of the Source
+        Args:
+            range_ (range object or nparray): Range for the time
+            time (sp.core.symbol.Symbol or None): Unused, the voltage is calculated numerically
+        Returns:
+            Tuple:
+                (nparray of times,
+                nparray of voltages)
+        """
+        range_ = np.asarray(range_, dtype = float)
+        return (range_, self.samples(range_))
+
+    def samples(self, time, out = None):
+        """Calculate the voltage of the Source with NumPy
+        The symbolic expressions aren't used, the samples are calculated in place in one buffer
+        Args:
+            time (nparray): [s] times to calculate values at
+            out (nparray or None): float64 buffer of the shape of time that's filled with the values
+        Returns:
+            nparray: [V] voltage for every time
+        """
+        return _wave_samples(_wave(self), time, out)
+
     def plot(self, range_, time):
         """Plot the voltage for the Source
         Args:
@@ -572,6 +1661,35 @@ class ACSource(VoltageSource):
     def __add__(self, other):
         return MixedSource(self, other)
 
+    def phasors(self, harmonics = 51):
+        """Decompose the voltage into phasors
+        Triangular and rectangular waves are expanded into their Fourier series up to the given harmonic
+        Args:
+            harmonics (int): Highest harmonic used for non-sinusoidal waves
+        Returns:
+            list of tuple: (frequency, complex phasor)
+        """
+        if self.mode == "AC sine":
+            return [(0, complex(self.reference)), (self.frequency, self.peakvoltage*np.exp(1j*(self.phase-np.pi/2)))]
+        n = np.arange(1, harmonics+1, 2)
+        if self.mode == "AC tri": # 8/pi²*sum(cos(n*x)/n²) with x shifted like in _triwave
+            phasors = 8*self.peakvoltage/(np.pi*n)**2*np.exp(-1j*n*(np.pi/2+self.phase))
+        elif self.mode == "AC rect": # 4/pi*sum(sin(n*x)/n) with x shifted like in _rectwave
+            phasors = 4*self.peakvoltage/(np.pi*n)*np.exp(-1j*(np.pi/2+2*np.pi*n*self.frequency*self.phase))
+        else:
+            raise ValueError("Selected mode doesn't exist")
+        return [(0, complex(self.reference))] + list(zip((n*self.frequency).tolist(), phasors))
+
+    def __radd__(self, other):
+        if other == 0: # start value of sum()
+            return self
+        return MixedSource(other, self)
+
+    def get_rms(self):
+        return _mixed_rms(tuple(_wave(source) for source in self.base_sources), self.frequency)
+
+    rms = property(get_rms, None, None, "[V] RMS voltage, None if it can't be calculated")
+
     """ commented out because it takes ages and using __add__ and propagating the base formulas is a quicker and more importantly exact method
     def fourier_analysis(self):
         Caculate fourier series of voltage
@@ -584,83 +1702,239 @@ class ACSource(VoltageSource):
         return self.fourier_series
     """
 
+def _wave(source):
+    """Hashable description of a base source
+    Returns:
+        Tuple: (mode, peak voltage, frequency, phase, reference)
+    """
+    if isinstance(source, ACSource):
+        return (source.mode, source.peakvoltage, source.frequency, source.phase, source.reference)
+    return ("DC", 0, 0, 0, source.voltage)
+
+def _wave_samples(wave, time, out = None):
+    """Values of a wave described by _wave()
+    """
+    mode, peak, frequency, phase, reference = wave
+    if mode == "AC sine":
+        return ACSource._sinewave_samples(peak, frequency, time, phase, reference, out)
+    elif mode == "AC tri":
+        return ACSource._triwave_samples(peak, frequency, time, phase, reference, out)
+    elif mode == "AC rect":
+        return ACSource._rectwave_samples(peak, frequency, time, phase, reference, out)
+    out = _buffer(time, out)
+    out.fill(reference)
+    return out
+
+_max_harmonics = 4096 # sums of waves with more harmonics of their common frequency are treated as incommensurate
+
+@functools.lru_cache(maxsize = 1024)
+def _mixed_peak(waves, frequency):
+    """Peak voltage of a sum of waves
+    Sums of sines are written as a trigonometric polynomial of the common frequency, sampled over one period
+    with an inverse FFT and the maximum is refined with Newton's method.
+    Other waveforms are sampled on a coarse grid over one period and refined around the maximum.
+    Args:
+        waves (tuple of tuple): _wave() of all base sources
+        frequency (numeric or None): [Hz] Common frequency of all waves, None if there's none
+    Returns:
+        float: [V] Peak voltage
+    """
+    offset = sum(wave[4] for wave in waves if wave[0] == "DC")
+    waves = [wave for wave in waves if wave[0] != "DC"]
+    if frequency is not None and max((wave[2]/frequency for wave in waves), default = 0) > _max_harmonics:
+        frequency = None # sampling that many harmonics isn't feasible
+    if frequency is None: # Can't have None, so worst case it is
+        return offset + sum(abs(wave[1]) + wave[4] for wave in waves)
+    harmonics = np.array([int(round(wave[2]/frequency)) for wave in waves], dtype = int)
+    n_max = harmonics.max(initial = 0)
+    if all(wave[0] == "AC sine" for wave in waves):
+        coefficients = np.zeros(n_max+1, dtype = complex) # phasor of every harmonic
+        for (_, peak, _, phase, reference), n in zip(waves, harmonics):
+            coefficients[n] += peak*np.exp(1j*(phase-np.pi/2)) # sin(x) = Re(exp(j*(x-pi/2)))
+            offset += reference
+        points = 2**int(np.ceil(np.log2(16*(n_max+1))))
+        spectrum = np.zeros(points//2+1, dtype = complex)
+        spectrum[:n_max+1] = coefficients*points/2
+        samples = np.fft.irfft(spectrum, points)
+        n = np.arange(n_max+1)
+        angle = 2*np.pi*np.argmax(samples)/points
+        peak = samples.max()
+        for _ in range(8): # Newton's method on the derivative
+            rotated = coefficients*np.exp(1j*n*angle)
+            d1 = np.real(1j*n*rotated).sum()
+            d2 = np.real(-n**2*rotated).sum()
+            if d2 >= 0:
+                break
+            angle -= np.clip(d1/d2, -2*np.pi/points, 2*np.pi/points)
+            peak = max(peak, np.real((coefficients*np.exp(1j*n*angle)).sum()))
+        return offset + peak
+    period = 1/frequency
+    time = np.linspace(0, period, max(4096, 64*n_max), endpoint = False)
+    step = time[1]
+    for _ in range(4):
+        voltages = sum(_wave_samples(wave, time) for wave in waves)
+        at_peak = time[np.argmax(voltages)]
+        time = np.linspace(at_peak-step, at_peak+step, 1001)
+        step = time[1]-time[0]
+    return offset + voltages.max()
+
+@functools.lru_cache(maxsize = 1024)
+def _mixed_rms(waves, frequency):
+    """RMS voltage of a sum of waves
+    Sums of sines use the phasor of every frequency, other waveforms are sampled over one period
+    Args:
+        waves (tuple of tuple): _wave() of all base sources
+        frequency (numeric or None): [Hz] Common frequency of all waves, None if there's none
+    Returns:
+        float or None: [V] RMS voltage, None if it can't be calculated
+    """
+    if all(wave[0] in ("AC sine", "DC") for wave in waves):
+        phasors = collections.defaultdict(complex)
+        offset = 0
+        for mode, peak, frequency_, phase, reference in waves:
+            offset += reference
+            if mode != "DC":
+                phasors[frequency_] += peak*np.exp(1j*(phase-np.pi/2))
+        return math.sqrt(offset**2 + sum(abs(phasor)**2/2 for phasor in phasors.values()))
+    if frequency is not None and max((wave[2]/frequency for wave in waves), default = 0) > _max_harmonics:
+        frequency = None # sampling that many harmonics isn't feasible
+    if frequency is None:
+        return None
+    n_max = max((int(round(wave[2]/frequency)) for wave in waves), default = 0)
+    time = np.linspace(0, 1/frequency, max(2**16, 256*n_max), endpoint = False)
+    voltages = sum(_wave_samples(wave, time) for wave in waves)
+    return math.sqrt(np.mean(voltages**2))
+
+def _rational(x, tolerance):
+    """Approximate a positive number by the first convergent of its continued fraction within a tolerance
+    Args:
+        x (float): Number to approximate
+        tolerance (float): Relative tolerance
+    Returns:
+        fractions.Fraction: The approximation
+    """
+    whole = math.floor(x)
+    h, h_previous, k, k_previous = whole, 1, 1, 0
+    rest = x - whole
+    while abs(x - h/k) > tolerance*x and rest > 0:
+        rest = 1/rest
+        whole = math.floor(rest)
+        rest -= whole
+        h, h_previous = whole*h + h_previous, h
+        k, k_previous = whole*k + k_previous, k
+    return fractions.Fraction(h, k)
+
+def common_frequency(frequencies, tolerance = 1e-9, max_denominator = 1000):
+    """Find the common fundamental frequency of a set of frequencies
+    Every frequency is an integer multiple of the result. The ratios to the lowest frequency are approximated
+    with continued fractions, so the effort grows with the logarithm of the frequencies.
+    Examples:
+        >>> common_frequency((50, 2500*1.01))
+        25.0
+
+    Args:
+        frequencies (iterable of numeric): [Hz] Frequencies, 0 (DC) is ignored
+        tolerance (float): Relative tolerance of the frequencies
+        max_denominator (int): Largest allowed ratio between the lowest and the common frequency
+    Returns:
+        None: If there's no common frequency
+        float: [Hz] Common frequency
+    """
+    frequencies = [frequency for frequency in frequencies if frequency != 0]
+    if not frequencies:
+        return None
+    lowest = min(frequencies)
+    common = fractions.Fraction(1)
+    for frequency in frequencies:
+        ratio = _rational(frequency/lowest, tolerance)
+        common = fractions.Fraction(math.gcd(common.numerator*ratio.denominator, ratio.numerator*common.denominator),
+            common.denominator*ratio.denominator)
+        if common.denominator > max_denominator:
+            return None
+    return lowest*common.numerator/common.denominator
+
 class MixedSource(ACSource):
+    """Sum of any number of sources
+    Attributes:
+        base_sources (tuple): All single sources the MixedSource consists of
+        peakvoltage (float): [V] Peak value of the voltage, calculated on first access
+    """
     mixed_source_counter = 1
 
-    @staticmethod
-    def _gcd(x1, x2):
-        """Find Greatest Common Divisor (gcd) of two values
+    def get_peakvoltage(self):
+        if self._peakvoltage is None:
+            self._peakvoltage = _mixed_peak(tuple(_wave(source) for source in self.base_sources), self.frequency)
+        return self._peakvoltage
+    def set_peakvoltage(self, peakvoltage):
+        self._peakvoltage = peakvoltage
+
+    def get_voltage(self):
+        if self._voltage is None:
+            self._voltage = sp.Add(*(source.voltage for source in self.base_sources))
+        return self._voltage
+
+    peakvoltage = property(get_peakvoltage, set_peakvoltage, None, "[V] Peak value of the voltage")
+    voltage = property(get_voltage, ACSource.set_voltage, None, "Equation of the wave, SymPy is only used once it's accessed")
+
+    def __init__(self, *sources):
+        """Create "Metasource" out of sources
+        Connects all sources on one pole, the other poles remain at ground, essentially creating a mixed signal source
+        Requires that all sources use the same time symbol. Nested MixedSources are flattened into their base sources.
         Args:
-            x1 (numeric): Value one
-            x2 (numeric): Value two
+            *sources (:ACSource: or :DCSource:): Sources to combine, at least one has to be an :ACSource:
+        """
+        if not sources:
+            raise ValueError("A MixedSource needs at least one source")
+        name = "Mixed Source {}".format(MixedSource.mixed_source_counter)
+        MixedSource.mixed_source_counter += 1
+        base_sources = tuple(base for source in sources for base in source.base_sources)
+        frequency = common_frequency(source.frequency for source in base_sources)
+        time = next((source.time for source in base_sources if isinstance(source, ACSource)), None)
+        if time is None:
+            raise ValueError("A MixedSource needs at least one AC source, sums of DC sources are a single DCSource")
+        super().__init__(name, 0, 0, frequency, time, "AC Mixed")
+        self._peakvoltage = None # peak search is deferred until the peak is needed
+        if any(getattr(source, "_symbolic", False) for source in base_sources):
+            self._symbolic = True
+            self.symbolic_voltage = sp.Add(*(source.symbolic_voltage if getattr(source, "_symbolic", False) else source.voltage for source in base_sources))
+        self.base_sources = base_sources
+        self.mode = "Mixed AC"
+        del self.phase
+
+    @classmethod
+    def from_sources(cls, sources):
+        """Create one flat MixedSource out of an iterable of sources
+        Args:
+            sources (iterable of :ACSource: or :DCSource:): Sources to combine
         Returns:
-            None: If there's no gcd
-            float: gcd
+            MixedSource: Sum of all sources
         """
-        if x1 <= x2:
-            gcd = x1
-        else:
-            gcd = x2
-        while not (x1/gcd).is_integer() or not (x2/gcd).is_integer():
-            gcd -= 1
-            if gcd <= 0:
-                return None
-        else:
-            return gcd
-
-    def __init__(self, source1, source2):
-        """Create "Metasource" out of two sources
-        Connects both sources on one pole, the other poles remain at ground, essentially creating a mixed signal source
-        Requires that both sources use the same time symbol
-        """
-        if "mixed_source_counter" not in locals(): 
-            mixed_source_counter = 0
-        name = "Mixed Source {}".format(mixed_source_counter)
-        mixed_source_counter += 1
-        voltage = source1.voltage + source2.voltage
-        
-        frequency = self._gcd(source1.frequency, source2.frequency)
-        if frequency is not None:
-            period = 1/frequency
-            range_1 = np.linspace(period, 2*period, 20e3) # bruteforcing approximation of peakvoltage
-            voltage_lambda = eval(voltage)[0]
-            voltages = voltage_lambda(range_1)
-            max1 = voltages.max()
-            index = np.where(voltages == max1)[0]
-            if index not in [0, int(20e3)-1]: # checking for edge cases - first/last item
-                range_2 = np.linspace(voltages[index-1], voltages[index+1], 200e3)
-            elif index == 0:
-                range_2 = np.linspace(voltages[index], voltages[index+1], 200e3)
-            elif index == int(20e3)-1:
-                range_2 = np.linspace(voltages[index-1], voltages[index], 200e3)
-            voltages_2 = voltage_lambda(range_2)
-            peak = voltages_2.max()
-        else:
-            peak = source1.peakvoltage+source2.peakvoltage # Can't have None, so worst case it is
+        return cls(*sources)
 
-        """Analytical approach would need to find all roots in one T and choose the one where f(x0) is max
-        dx = sp.diff(voltage, source1.time) # find peakvoltage of new source
-        lambda_dx  = sp.lambdify(source1.time, dx)
-        print(lambda_dx(0))
-        time_at_peak = mpmath.findroot(lambda_dx, 0)
-        peak = voltage.subs(source1.time, time_at_peak)
+    def phasors(self, harmonics = 51):
+        """Decompose the voltage into phasors of all base sources
+        Args:
+            harmonics (int): Highest harmonic used for non-sinusoidal waves
+        Returns:
+            list of tuple: (frequency, complex phasor)
         """
-        super().__init__(name, peak, 0, frequency, source1.time, "AC Mixed")
-        self.voltage = voltage
-        try:
-            if source1._symbolic & source2._symbolic:
-                self.symbolic_voltage = source1.symbolic_voltage + source2.symbolic_voltage
-            elif source1._symbolic:
-                self.symbolic_voltage = source1.symbolic_voltage + source2.voltage
-            elif source2._symbolic:
-                self.symbolic_voltage = source1.voltage + source2.symbolic_voltage
-        except AttributeError as err:
-            error_messages = ("'{}' object has no attribute '_symbolic'".format(instance.__class__.__name__) for instance in [source1, source2])
-            if not err.args[0] in error_messages:
-                raise
-        self.base_sources = (*source1.base_sources, *source2.base_sources)
-        self.mode = "Mixed AC"
-        del self.phase
+        return [phasor for source in self.base_sources for phasor in source.phasors(harmonics)]
+
+    def samples(self, time, out = None):
+        """Calculate the voltage of the Source with NumPy
+        The base sources are accumulated in place, using one additional buffer
+        Args:
+            time (nparray): [s] times to calculate values at
+            out (nparray or None): float64 buffer of the shape of time that's filled with the values
+        Returns:
+            nparray: [V] voltage for every time
+        """
+        out = _buffer(time, out)
+        out.fill(0)
+        scratch = np.empty_like(out)
+        for source in self.base_sources:
+            out += _wave_samples(_wave(source), time, scratch)
+        return out
 
 class Ground(VoltageSource):
     """Ground for Circuits
@@ -685,11 +1959,27 @@ class Circuit():
         source1 (:VoltageSource: or :Ground:): Voltage source that's connected to one side of the circuit
         source2 (:VoltageSource: or :Ground:): Voltage source that's connected to the other side of the circuit
         system (:System:): Components between the poles
+        harmonics (int): Highest harmonic used for non-sinusoidal sources
+    Attributes:
+        phasors (dict): frequency: complex phasor of the current from source1 through the system to source2
+        current (Sympy Expression): Equation of the current, sum of the sinusoids of all phasors
     """
-    def __init__(self, source1, system, source2):
+    def get_current(self):
+        if self._current is None:
+            time = next((_symbol(source.time) for source in (*self.source1.base_sources, *self.source2.base_sources) if isinstance(source, ACSource)), None)
+            self._current = sum(abs(phasor)*sp.cos(2*sp.pi*frequency*time+np.angle(phasor)) if frequency else phasor.real
+                for frequency, phasor in self.phasors.items())
+        return self._current
+
+    def get_voltage(self):
+        return self.source1.voltage - self.source2.voltage
+
+    current = property(get_current, None, None, "Equation of the current")
+    voltage = property(get_voltage, None, None, "Equation of the voltage across the system")
+
+    def __init__(self, source1, system, source2, harmonics = 51):
         self.source1 = source1
         self.source2 = source2
-        self.voltage = self.source1.voltage - self.source2.voltage
         self.system = system
         dc = (DCSource, Ground)
         if isinstance(source1, dc) and isinstance(source2, dc):
@@ -705,20 +1995,58 @@ class Circuit():
         
         self.name = "{}-{}-{}".format(source1.name, system.name, source2.name)
 
-        # superposition solving
-        # If you've got a custom source you have to do a fourier series expansion and 
-        # calculate the current for each coefficient with respective frequency -> then superimpose them
-        base_sources = (*self.source1.base_sources,*self.source2.base_sources)
-       
-        currents = []
-        lamb_impedance = eval(self.system.impedance)[0]
-        for source in base_sources:
-            try:
-                current = source.voltage/lamb_impedance(source.frequency) if source in self.source1.base_sources else -source.voltage/lamb_impedance(source.frequency)
-            except ZeroDivisionError:
-                current = 0
-            currents.append(current)
-        self.current = sum(currents)
+        # superposition solving in the phasor domain
+        # every source is decomposed into phasors, the impedance is evaluated once per frequency
+        voltages = collections.defaultdict(complex)
+        for sign, source in ((1, source1), (-1, source2)):
+            for frequency, phasor in source.phasors(harmonics):
+                voltages[float(frequency)] += sign*phasor
+        frequencies = sorted(voltages)
+        impedances = self.system._impedance_at(frequencies)
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            admittances = np.where(np.isinf(impedances), 0, 1/impedances)
+        self.phasors = {frequency: voltages[frequency]*admittance for frequency, admittance in zip(frequencies, admittances)}
+        self._current = None
+
+    def to_netlist(self):
+        """Convert the Circuit to a :Netlist:
+        source1 is connected between node "1" and ground, source2 between node "2" and ground
+        and the system between "1" and "2". Grounds connect their side directly to the ground node.
+        Returns:
+            :Netlist: The Circuit as network
+        """
+        from .Netlist import Netlist
+        netlist = Netlist(self.name)
+        nodes = []
+        for node, source in (("1", self.source1), ("2", self.source2)):
+            if isinstance(source, Ground):
+                nodes.append(netlist.ground)
+            else:
+                nodes.append(node)
+                netlist.add(source, node, netlist.ground)
+        netlist.add(self.system, *nodes)
+        return netlist
+
+    def sweep(self, frequencies, frequency = None):
+        """Calculate the Circuit for a whole frequency band at once
+        Every AC source excites every frequency with its peak voltage and phase, DC sources and DC offsets only
+        excite 0Hz. Mixed sources excite with all their base sources. The voltage across the system is the
+        difference of the source phasors, so no network has to be solved
+        Args:
+            frequencies (nparray): [Hz] Frequencies to evaluate at
+            frequency (sp.core.symbol.Symbol or None): Symbol of the frequency of the system
+        Returns:
+            SweepResult: complex arrays of impedance and admittance of the system, current from source1 through
+                the system to source2 and voltage across the system for every frequency
+        """
+        from .Netlist import _phasor
+        frequencies = np.asarray(frequencies, dtype = float)
+        voltage = _phasor(self.source1, frequencies)-_phasor(self.source2, frequencies)
+        impedance = self.system.compile(frequency).impedance(frequencies)
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            admittance = 1/impedance
+        current = np.where(voltage == 0, 0, voltage*admittance)
+        return SweepResult(frequencies, impedance, admittance, current, voltage)
 
     def _plot(self, range_, time, complex_):
         """Plot the current for the Circuit
@@ -726,24 +2054,67 @@ class Circuit():
             range_ (range object or nparray): Range for the time
             time (sp.core.symbol.Symbol): Symbol of the time of the circuit
         """
-        range_ = _checkrange(range_)
+        range_, current = self.current_waveform(_checkrange(range_), time)
 
-        lambda_func = sp.lambdify(time, self.current)
-        lambda_func_vec = np.vectorize(lambda_func)
-        current = lambda_func_vec(range_)
-        
         if complex_:
-            plt.plot(range_, current.real, label = "real")
-            plt.plot(range_, current.imag, label = "imaginary")
-            plt.plot(range_, np.sqrt(current.real**2+current.imag**2), label = "abs(i)")
+            plt.plot(range_, current, label = "i")
+            plt.plot(range_, np.abs(current), label = "abs(i)")
         else:
-            plt.plot(range_, np.sqrt(current.real**2+current.imag**2))
+            plt.plot(range_, current)
         plt.ylabel(r"$i_{0}/A$".format(self.name))
         plt.xlabel(r"$t_{0}/s$".format(self.name))
         plt.gcf().canvas.set_window_title("{}".format(self.name))
         plt.legend()
         plt.show()
 
+    def current_samples(self, time, out = None):
+        """Calculate the current of the Circuit from its phasors with NumPy
+        Args:
+            time (nparray): [s] times to calculate values at
+            out (nparray or None): float64 buffer of the shape of time that's filled with the values
+        Returns:
+            nparray: [A] current for every time
+        """
+        out = _buffer(time, out)
+        out.fill(0)
+        scratch = np.empty_like(out)
+        for frequency, phasor in self.phasors.items():
+            np.multiply(time, 2*np.pi*frequency, out = scratch)
+            scratch += np.angle(phasor)
+            np.cos(scratch, out = scratch)
+            scratch *= abs(phasor)
+            out += scratch
+        return out
+
+    def current_waveform(self, range_, time = None):
+        """Calculate the current of the Circuit
+        Args:
+            range_ (range object or nparray): Range for the time
+            time (sp.core.symbol.Symbol or None): Unused, the current is calculated numerically
+        Returns:
+            Tuple:
+                (nparray of times,
+                nparray of currents)
+        """
+        range_ = np.asarray(range_, dtype = float)
+        return (range_, self.current_samples(range_))
+
+    def current_stream(self, start, stop, samplerate, time = None, chunksize = 2**16):
+        """Generate the current of the Circuit chunk by chunk
+        Args:
+            start (numeric): [s] Time of the first sample
+            stop (numeric or None): [s] End of the time span (exclusive), None for an endless stream
+            samplerate (numeric): [Hz] Samples per second
+            time (sp.core.symbol.Symbol or None): Unused, the current is calculated numerically
+            chunksize (int): Samples per chunk, the last chunk can be shorter
+        Yields:
+            Tuple:
+                (nparray of times,
+                nparray of currents)
+        """
+        for range_ in _chunks(start, stop, samplerate, chunksize):
+            yield self.current_waveform(range_, time)
+
     def plot(self, range_, time, complex_):
         """Plot the current for the Circuit
         Args:
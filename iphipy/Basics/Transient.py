@@ -0,0 +1,234 @@
+import numpy as np
+
+from .Netlist import sparse, sparse_linalg, dense_limit, _R
+from .Systems import Circuit
+
+"""Provides time domain (transient) simulation of networks
+The MNA system of a :Netlist: is the differential algebraic equation A0*x + A1*dx/dt = b(t), with the same
+matrices that are used in the frequency domain. It's integrated with a fixed step, so the matrix of every
+step is the same and is factorized only once.
+"""
+
+class Transient():
+    """Fixed step transient simulator
+    Attributes:
+        netlist (:Netlist:): The simulated network
+        step (float): [s] Time step
+        method (str): "trapezoidal" or "backward euler"
+    """
+    def __init__(self, network, step, method = "trapezoidal"):
+        """
+        Args:
+            network (:Netlist: or :Circuit:): Network to simulate, Circuits are converted with Circuit.to_netlist()
+            step (float): [s] Time step
+            method (str): "trapezoidal" (second order) or "backward euler" (first order, strongly damped)
+        """
+        if method not in ("trapezoidal", "backward euler"):
+            raise ValueError("Selected method doesn't exist")
+        self.netlist = network.to_netlist() if isinstance(network, Circuit) else network
+        self.step = step
+        self.method = method
+        rows, cols, a0, a1, excitations, size = self.netlist._assemble()
+        self._rows = np.array([row for row, _ in excitations], dtype = int)
+        self._sources = [source for _, source in excitations]
+        self._size = size
+        self._dense = size <= dense_limit or sparse is None
+        if self._dense:
+            self._A0 = np.zeros((size, size))
+            self._A1 = np.zeros((size, size))
+            np.add.at(self._A0, (rows, cols), a0)
+            np.add.at(self._A1, (rows, cols), a1)
+        else:
+            self._A0 = sparse.csc_matrix((a0, (rows, cols)), shape = (size, size))
+            self._A1 = sparse.csc_matrix((a1, (rows, cols)), shape = (size, size))
+        self._operators = {}
+
+    def _operator(self, method):
+        """Factorize the matrix of one integration step
+        Every step solves M*x[n+1] = N*x[n] + b[n+1] + w*b[n]
+        Args:
+            method (str): "trapezoidal" or "backward euler"
+        Returns:
+            Tuple:
+                dense: (P, Q, w) with x[n+1] = P*x[n] + Q*(b[n+1] + w*b[n])
+                sparse: (factorized M, N, w)
+        """
+        if method not in self._operators:
+            h = self.step
+            if method == "trapezoidal":
+                M, N, w = self._A0 + 2/h*self._A1, 2/h*self._A1 - self._A0, 1
+            else:
+                M, N, w = self._A0 + self._A1/h, self._A1/h, 0
+            if self._dense:
+                incidence = np.zeros((self._size, len(self._rows)))
+                incidence[self._rows, np.arange(len(self._rows))] = 1
+                propagation = np.linalg.solve(M, np.hstack((N, incidence))) # one factorization for all columns
+                self._operators[method] = (propagation[:, :self._size], propagation[:, self._size:], w)
+            else:
+                self._operators[method] = (sparse_linalg.splu(M.tocsc()), N, w)
+        return self._operators[method]
+
+    def _initial(self, initial, excitation):
+        """Get the state at the first time step
+        Args:
+            initial (str or nparray): "zero" for discharged capacitors and currentless inductances,
+                "dc" for the DC operating point of the sources at the first time step or a state vector
+            excitation (nparray): source voltages at the first time step
+        Returns:
+            nparray: state vector
+        """
+        if isinstance(initial, str):
+            if initial == "zero":
+                return np.zeros(self._size)
+            elif initial == "dc":
+                b = np.zeros(self._size)
+                b[self._rows] = excitation
+                if self._dense:
+                    return np.linalg.solve(self._A0, b)
+                return sparse_linalg.spsolve(self._A0, b)
+            raise ValueError("Selected initial state doesn't exist")
+        return np.asarray(initial, dtype = float)
+
+    def _excitation(self, time):
+        """Get the source voltages
+        Args:
+            time (nparray): [s] Times to sample the sources at
+        Returns:
+            nparray: voltage of every source at every time, shape (sources, times)
+        """
+        excitation = np.empty((len(self._sources), len(time)))
+        for k, source in enumerate(self._sources):
+            source.samples(time, out = excitation[k])
+        return excitation
+
+    def stream(self, stop, start = 0, initial = "zero", chunksize = 2**14, decimate = 1):
+        """Simulate the network chunk by chunk
+        Sources, source terms and states are only held for one chunk of steps at a time, so arbitrarily long
+        simulations can be processed or stored (e.g. with Results.ResultWriter) without holding them in memory
+        Args:
+            stop (numeric): [s] End of the simulation
+            start (numeric): [s] Start of the simulation
+            initial (str or nparray): "zero", "dc" or a state vector, see _initial()
+            chunksize (int): Number of steps integrated per chunk
+            decimate (int): Only every decimate-th step is yielded, the integration still uses all steps
+        Yields:
+            Tuple:
+                (nparray of times,
+                nparray of states, shape (steps of the chunk, unknowns))
+        """
+        if chunksize < 1 or decimate < 1:
+            raise ValueError("chunksize and decimate have to be positive")
+        steps = int(round((stop-start)/self.step))
+        x = np.empty((chunksize+1, self._size)) # row 0 is the last state of the previous chunk
+        excitation = self._excitation(np.array([start], dtype = float))
+        x[0] = self._initial(initial, excitation[:, 0])
+        # one damped step, so the zero state doesn't have to be consistent with the sources
+        damped = self.method == "trapezoidal" and isinstance(initial, str) and initial == "zero"
+        done = 0 # index of the state in row 0
+        if steps == 0:
+            yield np.array([start], dtype = float), x[:1].copy()
+        while done < steps:
+            size = min(chunksize, steps-done)
+            time = start + np.arange(done+1, done+size+1)*self.step
+            excitation = np.hstack((excitation[:, -1:], self._excitation(time)))
+            first = 0
+            if done == 0 and damped:
+                self._advance(x, excitation, "backward euler", 0, 1)
+                first = 1
+            self._advance(x, excitation, self.method, first, size)
+            rows = np.arange(0 if done == 0 else 1, size+1) # the initial state is only yielded once
+            rows = rows[(done+rows) % decimate == 0]
+            if len(rows):
+                yield start + (done+rows)*self.step, x[rows]
+            x[0] = x[size]
+            done += size
+
+    def run(self, stop, start = 0, initial = "zero", decimate = 1, chunksize = 2**14):
+        """Simulate the network
+        Args:
+            stop (numeric): [s] End of the simulation
+            start (numeric): [s] Start of the simulation
+            initial (str or nparray): "zero", "dc" or a state vector, see _initial()
+            decimate (int): Only every decimate-th step is stored, the integration still uses all steps.
+                Currents of capacitors are derived from the stored voltages, so they get coarser as well
+            chunksize (int): Number of steps integrated at once, see stream()
+        Returns:
+            :TransientSolution: node voltages and branch currents for every stored time step
+        """
+        steps = int(round((stop-start)/self.step))
+        time = np.empty(steps//decimate+1)
+        x = np.empty((len(time), self._size))
+        index = 0
+        for time_, x_ in self.stream(stop, start, initial, chunksize, decimate):
+            time[index:index+len(time_)] = time_
+            x[index:index+len(time_)] = x_
+            index += len(time_)
+        return TransientSolution(self.netlist, time, x)
+
+    def _advance(self, x, excitation, method, first, last):
+        """Integrate from step first to step last in place
+        """
+        if first >= last:
+            return
+        if self._dense:
+            propagation, injection, w = self._operator(method)
+            b = excitation[:, first+1:last+1] + w*excitation[:, first:last]
+            q = (injection @ b).T # source terms of all steps at once
+            for k in range(first, last):
+                np.dot(propagation, x[k], out = x[k+1])
+                x[k+1] += q[k-first]
+        else:
+            lu, N, w = self._operator(method)
+            b = excitation[:, first+1:last+1] + w*excitation[:, first:last]
+            rhs = np.zeros(self._size)
+            for k in range(first, last):
+                rhs[:] = N @ x[k]
+                rhs[self._rows] += b[:, k-first]
+                x[k+1] = lu.solve(rhs)
+
+class TransientSolution():
+    """Result of a :Transient: simulation
+    Attributes:
+        netlist (:Netlist:): The simulated network
+        time (nparray): [s] Time of every step
+        voltages (nparray): [V] Node voltages, shape (steps, nodes)
+        branch_currents (nparray): [A] Currents through voltage sources and inductances, shape (steps, branches)
+    """
+    def __init__(self, netlist, time, x):
+        self.netlist = netlist
+        self.time = time
+        self.voltages = x[:, :len(netlist.nodes)]
+        self.branch_currents = x[:, len(netlist.nodes):]
+        self._branches = {index: k for k, index in enumerate(netlist._branches().tolist())}
+
+    def voltage(self, node1, node2 = None):
+        """Voltage between two nodes
+        Args:
+            node1 (str): Name of the node
+            node2 (str or None): Name of the reference node, standart is the ground
+        Returns:
+            nparray: voltage for every time step
+        """
+        def potential(node):
+            if node is None or node == self.netlist.ground:
+                return np.zeros(len(self.time))
+            return self.voltages[:, self.netlist._node_index[node]]
+        return potential(node1)-potential(node2)
+
+    def current(self, component):
+        """Current through a component from its first to its second node
+        For voltage sources this is the current flowing into the positive pole
+        Args:
+            component (:Component:, :VoltageSource: or str): Primitive component of the network or its name
+        Returns:
+            nparray: current for every time step
+        """
+        table = self.netlist.table
+        index = table.index(component)
+        if index in self._branches:
+            return self.branch_currents[:, self._branches[index]]
+        i, j = table.node1[index], table.node2[index]
+        u = (self.voltages[:, i] if i >= 0 else 0) - (self.voltages[:, j] if j >= 0 else 0)
+        if table.kind[index] == _R:
+            return u/table.value[index]
+        return table.value[index]*np.gradient(u, self.time)
@@ -1 +1,2 @@
-print("Imported "+__file__)
\ No newline at end of file
+"""Basic functions and classes of electrical engineering: conversions, filters, circuits and their analysis
+"""
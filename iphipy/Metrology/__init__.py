@@ -1 +1,2 @@
-print("Imported "+__file__)
\ No newline at end of file
+"""Functions of metrology like error calculations
+"""